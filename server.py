@@ -1,14 +1,50 @@
+import hashlib
+import importlib.util
 import json
-import math
 import os
+import re
+import secrets
 import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import List, Optional, Set, Tuple
+from typing import Callable, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlparse
 
 import httpx
+import numpy as np
 from fastmcp import FastMCP
 from openai import OpenAI
 
+try:
+	import sqlite_vec
+except ImportError:  # optional: in-database KNN for hybrid search
+	sqlite_vec = None
+
+try:
+	import orjson
+except ImportError:  # optional: faster JSON for stored tags
+	orjson = None
+
+
+def _json_loads(raw):
+	"""
+	Decode JSON with orjson when installed. Decode errors are
+	json.JSONDecodeError either way (orjson's error subclasses it).
+	"""
+	if orjson is not None:
+		return orjson.loads(raw)
+	return json.loads(raw)
+
+
+def _json_dumps(obj) -> str:
+	if orjson is not None:
+		return orjson.dumps(obj).decode("utf-8")
+	return json.dumps(obj)
+
 
 def _load_cursor_mcp_env() -> dict:
 	"""
@@ -61,6 +97,24 @@ DEFAULT_DB_URL = (
 
 EMBEDDING_PROVIDER = _get_env("EMBEDDING_PROVIDER", "openai")
 EMBEDDING_MODEL = _get_env("EMBEDDING_MODEL", "text-embedding-3-small")
+# Set to "int8" to store and search int8-quantized embeddings (one float32
+# scale per vector) instead of float32.
+EMBEDDING_QUANTIZE = (_get_env("EMBEDDING_QUANTIZE") or "").strip().lower()
+# Set to "numba" to score float32 matrices with a parallel JIT kernel instead
+# of NumPy's BLAS product (useful where BLAS is slow or single-threaded).
+EMBEDDING_KERNEL = (_get_env("EMBEDDING_KERNEL") or "").strip().lower()
+
+
+def _get_int_env(key: str, default: int) -> int:
+	try:
+		return int(_get_env(key, str(default)) or default)
+	except ValueError:
+		return default
+
+
+# How long vector-search results are reused for semantically equivalent
+# queries; 0 disables the semantic query cache.
+SEMANTIC_CACHE_TTL_SECONDS = _get_int_env("SEMANTIC_CACHE_TTL_SECONDS", 300)
 
 CREATE_TABLE_SQL = """
 CREATE TABLE IF NOT EXISTS memories (
@@ -73,15 +127,178 @@ CREATE TABLE IF NOT EXISTS memories (
 );
 """
 
+# created_at is ISO-8601 text from datetime('now'), so it sorts lexically and
+# "latest memories" can walk this index instead of sorting the table.
+CREATE_CREATED_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_memories_created ON memories(created_at DESC, id DESC)
+"""
+
 CREATE_EMBEDDINGS_SQL = """
 CREATE TABLE IF NOT EXISTS memory_embeddings (
   memory_id INTEGER PRIMARY KEY,
   model TEXT NOT NULL,
-  embedding TEXT NOT NULL,
+  embedding BLOB NOT NULL,
+  dim INTEGER,
+  normalized INTEGER NOT NULL DEFAULT 1,
+  embedding_q BLOB,
+  scale REAL,
   FOREIGN KEY(memory_id) REFERENCES memories(id) ON DELETE CASCADE
 );
 """
 
+CREATE_EMBEDDING_CACHE_SQL = """
+CREATE TABLE IF NOT EXISTS embedding_cache (
+  key BLOB PRIMARY KEY,
+  model TEXT NOT NULL,
+  vec BLOB NOT NULL
+);
+"""
+
+# Recent vector-search results keyed by query embedding. Any write to memories
+# or memory_embeddings clears it (see CREATE_QUERY_CACHE_TRIGGERS_SQL).
+CREATE_QUERY_CACHE_SQL = """
+CREATE TABLE IF NOT EXISTS query_cache (
+  id INTEGER PRIMARY KEY,
+  model TEXT NOT NULL,
+  params TEXT NOT NULL,
+  embedding BLOB NOT NULL,
+  result_ids BLOB NOT NULL,
+  created_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+"""
+
+CREATE_QUERY_CACHE_TRIGGERS_SQL = tuple(
+	f"""
+CREATE TRIGGER IF NOT EXISTS query_cache_clear_{table}_{event.lower()}
+AFTER {event} ON {table} BEGIN
+  DELETE FROM query_cache;
+END;
+"""
+	for table in ("memories", "memory_embeddings")
+	for event in ("INSERT", "UPDATE", "DELETE")
+)
+
+# Single-row counter bumped on every embedding write, plus a random token set
+# when the database is created (versions restart at 0 in a recreated file).
+# Together they identify the current set of embeddings across processes and
+# validate the matrix sidecar.
+CREATE_EMBEDDING_VERSION_SQL = """
+CREATE TABLE IF NOT EXISTS embedding_version (
+  id INTEGER PRIMARY KEY CHECK (id = 0),
+  version INTEGER NOT NULL,
+  token INTEGER
+);
+"""
+
+CREATE_EMBEDDING_VERSION_TRIGGERS_SQL = tuple(
+	f"""
+CREATE TRIGGER IF NOT EXISTS embedding_version_bump_{event.lower()}
+AFTER {event} ON memory_embeddings BEGIN
+  UPDATE embedding_version SET version = version + 1 WHERE id = 0;
+END;
+"""
+	for event in ("INSERT", "UPDATE", "DELETE")
+)
+
+# embedding_version/model the sqlite-vec index was last synced at, so searches
+# only rescan memory_embeddings after an embedding write.
+CREATE_VEC_INDEX_STATE_SQL = """
+CREATE TABLE IF NOT EXISTS vec_index_state (
+  id INTEGER PRIMARY KEY CHECK (id = 0),
+  embedding_version INTEGER NOT NULL,
+  model TEXT NOT NULL
+);
+"""
+
+# Memory ids whose embedding was written since the last sqlite-vec sync. Plain
+# SQL triggers fill it, so re-embeds by processes without the extension are
+# still picked up when the index is next synced.
+CREATE_VEC_INDEX_PENDING_SQL = """
+CREATE TABLE IF NOT EXISTS vec_index_pending (
+  memory_id INTEGER PRIMARY KEY
+);
+"""
+
+CREATE_VEC_INDEX_PENDING_TRIGGERS_SQL = tuple(
+	f"""
+CREATE TRIGGER IF NOT EXISTS vec_index_pending_{event.lower()}
+AFTER {event} ON memory_embeddings BEGIN
+  INSERT OR IGNORE INTO vec_index_pending (memory_id) VALUES ({row}.memory_id);
+END;
+"""
+	for event, row in (("INSERT", "new"), ("UPDATE", "new"), ("DELETE", "old"))
+)
+
+_INSERT_MEM_SQL = "INSERT INTO memories (content, title, tags, source) VALUES (?, ?, ?, ?)"
+
+_INSERT_EMB_SQL = """
+INSERT OR REPLACE INTO memory_embeddings (memory_id, model, embedding, dim, embedding_q, scale)
+VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+_SELECT_EMB_CACHE_SQL = "SELECT vec FROM embedding_cache WHERE key = ?"
+
+_INSERT_EMB_CACHE_SQL = (
+	"INSERT OR IGNORE INTO embedding_cache (key, model, vec) VALUES (?, ?, ?)"
+)
+
+_SEARCH_KW_SQL = """
+SELECT m.id, m.created_at, m.title, m.content, m.tags, m.source
+FROM memories_fts
+JOIN memories m ON m.id = memories_fts.rowid
+WHERE memories_fts MATCH ?
+ORDER BY bm25(memories_fts), m.id DESC
+LIMIT ?
+"""
+
+# Substring scan used when FTS5 finds nothing for a non-ASCII query.
+_SEARCH_KW_LIKE_SQL = """
+SELECT id, created_at, title, content, tags, source
+FROM memories
+WHERE content LIKE ? OR IFNULL(title, '') LIKE ?
+ORDER BY created_at DESC, id DESC
+LIMIT ?
+"""
+
+_LATEST_MEM_SQL = """
+SELECT id, created_at, title, content, tags, source
+FROM memories
+ORDER BY created_at DESC, id DESC
+LIMIT ?
+"""
+
+# Full-text index over memories.title/content, kept in sync by triggers.
+CREATE_FTS_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(
+  title,
+  content,
+  content='memories',
+  content_rowid='id',
+  tokenize='unicode61'
+);
+"""
+
+CREATE_FTS_TRIGGERS_SQL = (
+	"""
+CREATE TRIGGER IF NOT EXISTS memories_fts_ai AFTER INSERT ON memories BEGIN
+  INSERT INTO memories_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+END;
+""",
+	"""
+CREATE TRIGGER IF NOT EXISTS memories_fts_ad AFTER DELETE ON memories BEGIN
+  INSERT INTO memories_fts(memories_fts, rowid, title, content)
+  VALUES ('delete', old.id, old.title, old.content);
+END;
+""",
+	"""
+CREATE TRIGGER IF NOT EXISTS memories_fts_au AFTER UPDATE ON memories BEGIN
+  INSERT INTO memories_fts(memories_fts, rowid, title, content)
+  VALUES ('delete', old.id, old.title, old.content);
+  INSERT INTO memories_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+END;
+""",
+)
+
 
 def _resolve_db_path(_db_url: Optional[str]) -> Path:
 	"""
@@ -94,25 +311,321 @@ def _resolve_db_path(_db_url: Optional[str]) -> Path:
 	raw = DEFAULT_DB_URL
 
 	if raw.startswith("file:"):
-		from urllib.parse import urlparse
-
-		parsed = urlparse(raw)
-		return Path(parsed.path)
-
-	p = Path(raw)
-	if not p.is_absolute():
-		p = Path.cwd() / p
-	return p
+		return Path(urlparse(raw).path)
+	if os.path.isabs(raw):
+		return Path(raw)
+	return Path.cwd() / raw
+
+
+# One cached connection per (thread, database path); sqlite3 connections are
+# not shared across threads.
+_CONN_LOCAL = threading.local()
+
+_CONNECTION_PRAGMAS = (
+	"PRAGMA journal_mode = WAL",
+	"PRAGMA synchronous = NORMAL",
+	"PRAGMA temp_store = MEMORY",
+	"PRAGMA mmap_size = 268435456",
+	"PRAGMA cache_size = -65536",
+	"PRAGMA foreign_keys = ON",
+)
 
 
 def _get_connection(db_url: Optional[str]) -> sqlite3.Connection:
+	"""
+	Return this thread's connection to the configured database, opening and
+	initializing it on first use. Callers commit (e.g. `with conn:`) but do not
+	close the connection.
+	"""
 	path = _resolve_db_path(db_url)
+	conns = getattr(_CONN_LOCAL, "conns", None)
+	if conns is None:
+		conns = _CONN_LOCAL.conns = {}
+	conn = conns.get(path)
+	if conn is None:
+		conn = _open_connection(path)
+		conns[path] = conn
+	return conn
+
+
+# Database paths whose schema has been created/migrated by this process, so
+# connections opened later (e.g. by other threads) skip the DDL.
+_SCHEMA_READY: Set[Path] = set()
+_SCHEMA_LOCK = threading.Lock()
+
+
+def _open_connection(path: Path) -> sqlite3.Connection:
 	conn = sqlite3.connect(path)
 	conn.row_factory = sqlite3.Row
-	conn.execute("PRAGMA foreign_keys = ON")
+	for pragma in _CONNECTION_PRAGMAS:
+		conn.execute(pragma)
+	if sqlite_vec is not None:
+		_load_sqlite_vec(conn)
+	with _SCHEMA_LOCK:
+		if path not in _SCHEMA_READY:
+			_init_schema(conn)
+			_SCHEMA_READY.add(path)
+	return conn
+
+
+def _init_schema(conn: sqlite3.Connection) -> None:
 	conn.execute(CREATE_TABLE_SQL)
+	conn.execute(CREATE_CREATED_INDEX_SQL)
 	conn.execute(CREATE_EMBEDDINGS_SQL)
-	return conn
+	conn.execute(CREATE_EMBEDDING_CACHE_SQL)
+	conn.execute(CREATE_QUERY_CACHE_SQL)
+	conn.execute(CREATE_EMBEDDING_VERSION_SQL)
+	conn.execute(CREATE_VEC_INDEX_STATE_SQL)
+	_ensure_vec_index_pending(conn)
+	_ensure_embedding_version(conn)
+	_ensure_fts_index(conn)
+	_migrate_embeddings_to_blob(conn)
+	_migrate_embeddings_normalized(conn)
+	_migrate_embeddings_quantized(conn)
+	# After the migrations: rebuilding memory_embeddings drops its triggers.
+	for sql in (
+		CREATE_QUERY_CACHE_TRIGGERS_SQL
+		+ CREATE_EMBEDDING_VERSION_TRIGGERS_SQL
+		+ CREATE_VEC_INDEX_PENDING_TRIGGERS_SQL
+	):
+		conn.execute(sql)
+
+
+def _ensure_embedding_version(conn: sqlite3.Connection) -> None:
+	columns = {row["name"] for row in conn.execute("PRAGMA table_info(embedding_version)")}
+	token = secrets.randbits(63)
+	with conn:
+		if "token" not in columns:
+			conn.execute("ALTER TABLE embedding_version ADD COLUMN token INTEGER")
+		conn.execute(
+			"INSERT OR IGNORE INTO embedding_version (id, version, token) VALUES (0, 0, ?)",
+			(token,),
+		)
+		conn.execute(
+			"UPDATE embedding_version SET token = ? WHERE id = 0 AND token IS NULL", (token,)
+		)
+
+
+def _ensure_vec_index_pending(conn: sqlite3.Connection) -> None:
+	"""
+	Create vec_index_pending. When it is created for a database whose
+	sqlite-vec index was synced before, queue every embedding and clear the
+	sync state so the next search re-indexes vectors that may have changed
+	without being tracked.
+	"""
+	exists = conn.execute(
+		"SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'vec_index_pending'"
+	).fetchone()
+	conn.execute(CREATE_VEC_INDEX_PENDING_SQL)
+	if exists is None:
+		with conn:
+			conn.execute("INSERT INTO vec_index_pending SELECT memory_id FROM memory_embeddings")
+			conn.execute("DELETE FROM vec_index_state")
+
+
+def _close_connections() -> None:
+	"""
+	Close this thread's cached connections (used by tests and shutdown).
+	"""
+	conns = getattr(_CONN_LOCAL, "conns", None) or {}
+	for path, conn in conns.items():
+		conn.close()
+		with _SCHEMA_LOCK:
+			_SCHEMA_READY.discard(path)
+	conns.clear()
+
+
+def _load_sqlite_vec(conn: sqlite3.Connection) -> None:
+	try:
+		conn.enable_load_extension(True)
+		sqlite_vec.load(conn)
+		conn.enable_load_extension(False)
+	except (AttributeError, sqlite3.Error):
+		# Python builds without extension loading keep the NumPy search path.
+		pass
+
+
+def _vec_enabled(conn: sqlite3.Connection) -> bool:
+	try:
+		conn.execute("SELECT vec_version()")
+	except sqlite3.OperationalError:
+		return False
+	return True
+
+
+def _ensure_fts_index(conn: sqlite3.Connection) -> None:
+	"""
+	Create the memories_fts index and its sync triggers. When the index is
+	created for an existing database, populate it from the memories table.
+	"""
+	exists = conn.execute(
+		"SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'memories_fts'"
+	).fetchone()
+	conn.execute(CREATE_FTS_SQL)
+	for sql in CREATE_FTS_TRIGGERS_SQL:
+		conn.execute(sql)
+	if exists is None:
+		conn.execute("INSERT INTO memories_fts(memories_fts) VALUES ('rebuild')")
+		conn.commit()
+
+
+def _encode_embedding(vec) -> Tuple[bytes, int]:
+	"""
+	L2-normalize an embedding vector and serialize it as raw float32 bytes;
+	returns (blob, dim). Normalizing once at write time makes cosine similarity
+	a plain dot product at query time.
+	"""
+	arr = _normalize_vector(vec)
+	return arr.tobytes(), int(arr.size)
+
+
+def _normalize_vector(vec) -> np.ndarray:
+	arr = np.array(vec, dtype=np.float32).ravel()
+	arr /= float(np.linalg.norm(arr)) or 1.0
+	return arr
+
+
+def _quantize_int8(vec: np.ndarray) -> Tuple[np.ndarray, float]:
+	"""
+	Symmetric int8 quantization: returns (q, scale) with vec ≈ q * scale.
+	"""
+	scale = max(float(np.abs(vec).max()) if vec.size else 0.0, 1e-9) / 127.0
+	q = np.clip(np.round(vec / scale), -127, 127).astype(np.int8)
+	return q, scale
+
+
+def _decode_embedding(raw) -> Optional[np.ndarray]:
+	"""
+	Decode a stored embedding into a float32 vector. Accepts float32 BLOBs and
+	legacy JSON text; returns None for values that cannot be decoded.
+	"""
+	if isinstance(raw, (bytes, memoryview)):
+		if len(raw) == 0 or len(raw) % 4:
+			return None
+		return np.frombuffer(raw, dtype=np.float32)
+	try:
+		vec = json.loads(raw)
+	except (TypeError, ValueError):
+		return None
+	if not isinstance(vec, list) or not vec:
+		return None
+	try:
+		return np.asarray(vec, dtype=np.float32)
+	except (TypeError, ValueError):
+		return None
+
+
+def _store_embedding(conn: sqlite3.Connection, memory_id: int, vec) -> Optional[tuple]:
+	return _store_embeddings(conn, [(memory_id, vec)])
+
+
+def _store_embeddings(
+	conn: sqlite3.Connection, items: List[Tuple[int, object]]
+) -> Optional[tuple]:
+	"""
+	Insert or replace embeddings for (memory_id, vector) pairs in one executemany.
+
+	Returns (version_before, version_after, ids, rows) describing the write,
+	or None for mixed dimensions. Callers storing embeddings for newly created
+	memories pass it to _append_embedding_matrix once the transaction commits;
+	replaced rows must not be appended.
+	"""
+	quantize = EMBEDDING_QUANTIZE == "int8"
+	rows = []
+	for memory_id, vec in items:
+		blob, dim = _encode_embedding(vec)
+		blob_q, scale = None, None
+		if quantize:
+			q, scale = _quantize_int8(np.frombuffer(blob, dtype=np.float32))
+			blob_q = q.tobytes()
+		rows.append((memory_id, EMBEDDING_MODEL, blob, dim, blob_q, scale))
+	before = _embedding_version(conn)
+	conn.executemany(_INSERT_EMB_SQL, rows)
+	after = _embedding_version(conn)
+	if not rows or after[1] - before[1] != len(rows) or len({row[3] for row in rows}) != 1:
+		return None
+	matrix = np.vstack([np.frombuffer(row[2], dtype=np.float32) for row in rows])
+	return before, after, [row[0] for row in rows], matrix
+
+
+def _migrate_embeddings_to_blob(conn: sqlite3.Connection) -> None:
+	"""
+	One-shot migration for databases created when embeddings were stored as
+	JSON text: rebuild memory_embeddings with float32 BLOBs and a dim column.
+	"""
+	columns = {
+		row["name"]: (row["type"] or "").upper()
+		for row in conn.execute("PRAGMA table_info(memory_embeddings)")
+	}
+	if columns.get("embedding") != "TEXT":
+		return
+
+	conn.execute("BEGIN")
+	try:
+		conn.execute("ALTER TABLE memory_embeddings RENAME TO memory_embeddings_legacy")
+		conn.execute(CREATE_EMBEDDINGS_SQL)
+		rows = conn.execute(
+			"SELECT memory_id, model, embedding FROM memory_embeddings_legacy"
+		).fetchall()
+		converted = []
+		for row in rows:
+			vec = _decode_embedding(row["embedding"])
+			if vec is None:
+				continue
+			blob, dim = _encode_embedding(vec)
+			converted.append((row["memory_id"], row["model"], blob, dim))
+		conn.executemany(
+			"INSERT INTO memory_embeddings (memory_id, model, embedding, dim) VALUES (?, ?, ?, ?)",
+			converted,
+		)
+		conn.execute("DROP TABLE memory_embeddings_legacy")
+		conn.commit()
+	except Exception:
+		conn.rollback()
+		raise
+
+
+def _migrate_embeddings_normalized(conn: sqlite3.Connection) -> None:
+	"""
+	Add the `normalized` flag to memory_embeddings tables that predate it.
+	Existing rows were stored without normalization and are flagged 0 so the
+	search matrix normalizes them on load.
+	"""
+	columns = {row["name"] for row in conn.execute("PRAGMA table_info(memory_embeddings)")}
+	if "normalized" in columns:
+		return
+
+	conn.execute("BEGIN")
+	try:
+		conn.execute(
+			"ALTER TABLE memory_embeddings ADD COLUMN normalized INTEGER NOT NULL DEFAULT 1"
+		)
+		conn.execute("UPDATE memory_embeddings SET normalized = 0")
+		conn.commit()
+	except Exception:
+		conn.rollback()
+		raise
+
+
+def _migrate_embeddings_quantized(conn: sqlite3.Connection) -> None:
+	"""
+	Add the int8 `embedding_q` / `scale` columns to memory_embeddings tables
+	that predate them. Existing rows are quantized on load when enabled.
+	"""
+	columns = {row["name"] for row in conn.execute("PRAGMA table_info(memory_embeddings)")}
+	if "embedding_q" in columns and "scale" in columns:
+		return
+
+	conn.execute("BEGIN")
+	try:
+		if "embedding_q" not in columns:
+			conn.execute("ALTER TABLE memory_embeddings ADD COLUMN embedding_q BLOB")
+		if "scale" not in columns:
+			conn.execute("ALTER TABLE memory_embeddings ADD COLUMN scale REAL")
+		conn.commit()
+	except Exception:
+		conn.rollback()
+		raise
 
 
 def _get_memory_row(conn: sqlite3.Connection, memory_id: int) -> Optional[sqlite3.Row]:
@@ -123,14 +636,52 @@ def _get_memory_row(conn: sqlite3.Connection, memory_id: int) -> Optional[sqlite
 	return cur.fetchone()
 
 
-def _embed_text(text: str) -> Optional[List[float]]:
+# Maximum number of texts sent in a single embeddings request.
+_EMBED_BATCH_SIZE = 256
+
+# Provider clients are created once and reused so repeated calls keep their
+# pooled (TLS) connections instead of paying a new handshake each time.
+_CLIENT_LOCK = threading.Lock()
+_OPENAI_CLIENT: Optional[OpenAI] = None
+_OPENAI_CLIENT_KEY: Optional[str] = None
+_HTTPX_CLIENT: Optional[httpx.Client] = None
+
+
+def _get_openai_client(api_key: str) -> OpenAI:
+	global _OPENAI_CLIENT, _OPENAI_CLIENT_KEY
+	with _CLIENT_LOCK:
+		if _OPENAI_CLIENT is None or _OPENAI_CLIENT_KEY != api_key:
+			_OPENAI_CLIENT = OpenAI(api_key=api_key)
+			_OPENAI_CLIENT_KEY = api_key
+		return _OPENAI_CLIENT
+
+
+def _get_httpx_client() -> httpx.Client:
+	global _HTTPX_CLIENT
+	with _CLIENT_LOCK:
+		if _HTTPX_CLIENT is None:
+			_HTTPX_CLIENT = httpx.Client(
+				timeout=20.0,
+				# HTTP/2 needs the optional `h2` package (httpx[http2]).
+				http2=importlib.util.find_spec("h2") is not None,
+				limits=httpx.Limits(max_keepalive_connections=8),
+			)
+		return _HTTPX_CLIENT
+
+
+def _embed_texts(texts: List[str]) -> Optional[List[List[float]]]:
 	"""
-	Create an embedding vector for the given text using the configured provider/model.
+	Create embedding vectors for several texts, sending them to the provider as
+	one array `input` per request (in batches of _EMBED_BATCH_SIZE). Returns one
+	vector per text, in order, or None if the backend is unavailable.
 
 	Supported providers (via EMBEDDING_PROVIDER env):
 	- "openai" (default): uses OPENAI_API_KEY and OpenAI SDK
 	- "openrouter": uses OPENROUTER_API_KEY and OpenRouter HTTP API
 	"""
+	if not texts:
+		return []
+
 	if EMBEDDING_PROVIDER == "openrouter":
 		api_key = _get_env("OPENROUTER_API_KEY")
 		if not api_key:
@@ -151,15 +702,20 @@ def _embed_text(text: str) -> Optional[List[float]]:
 			headers["X-Title"] = app_name
 
 		try:
-			with httpx.Client(timeout=20.0) as client:
+			client = _get_httpx_client()
+			vecs: List[List[float]] = []
+			for start in range(0, len(texts), _EMBED_BATCH_SIZE):
+				batch = texts[start : start + _EMBED_BATCH_SIZE]
 				resp = client.post(
 					"https://openrouter.ai/api/v1/embeddings",
 					headers=headers,
-					json={"model": model, "input": text},
+					json={"model": model, "input": batch},
 				)
 				resp.raise_for_status()
-				data = resp.json()
-				return data["data"][0]["embedding"]
+				data = resp.json()["data"]
+				data.sort(key=lambda item: item.get("index", 0))
+				vecs.extend(item["embedding"] for item in data)
+			return vecs
 		except Exception:
 			# Any networking/SSL or API error disables embeddings for this call,
 			# and the caller will transparently fall back to keyword search.
@@ -171,24 +727,523 @@ def _embed_text(text: str) -> Optional[List[float]]:
 		return None
 
 	try:
-		client = OpenAI(api_key=api_key)
-		resp = client.embeddings.create(model=EMBEDDING_MODEL, input=text)
-		return resp.data[0].embedding
+		client = _get_openai_client(api_key)
+		vecs = []
+		for start in range(0, len(texts), _EMBED_BATCH_SIZE):
+			batch = texts[start : start + _EMBED_BATCH_SIZE]
+			resp = client.embeddings.create(model=EMBEDDING_MODEL, input=batch)
+			data = sorted(resp.data, key=lambda item: item.index)
+			vecs.extend(item.embedding for item in data)
+		return vecs
 	except Exception:
 		# Any networking/SSL or API error disables embeddings for this call,
 		# and the caller will transparently fall back to keyword search.
 		return None
 
 
-def _cosine_similarity(a: List[float], b: List[float]) -> float:
-	if not a or not b or len(a) != len(b):
-		return 0.0
-	dot = sum(x * y for x, y in zip(a, b))
-	norm_a = math.sqrt(sum(x * x for x in a))
-	norm_b = math.sqrt(sum(y * y for y in b))
-	if norm_a == 0.0 or norm_b == 0.0:
-		return 0.0
-	return dot / (norm_a * norm_b)
+# Row-normalized embedding matrix for the configured model, cached across calls
+# so vector search is a single matrix-vector product. Rebuilt lazily whenever
+# the embedding_version counter moves past it, except that rows saved by this
+# process are appended (see _append_embedding_matrix). Float32 matrices are memory-mapped from the <db>.emb.f32 sidecar. With
+# EMBEDDING_QUANTIZE=int8 the matrix is int8 and scales holds the per-row
+# scales. Searches run on several worker threads, so the cache is published
+# as one immutable (key, matrix, ids, scales) tuple, swapped under
+# _EMB_LOCK, and never mutated in place.
+_EMB_STATE: Optional[Tuple[tuple, np.ndarray, np.ndarray, Optional[np.ndarray]]] = None
+_EMB_LOCK = threading.Lock()
+
+# Rows per block when widening int8 rows to float32 for scoring, which bounds
+# the temporary copy made for each BLAS product.
+_INT8_SCORE_BLOCK = 4096
+
+
+def _invalidate_embedding_matrix() -> None:
+	global _EMB_STATE
+	with _EMB_LOCK:
+		_EMB_STATE = None
+
+
+def _publish_embedding_matrix(
+	key: Optional[tuple],
+	matrix: np.ndarray,
+	ids: np.ndarray,
+	scales: Optional[np.ndarray],
+) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+	"""
+	Cache (matrix, ids, scales) under `key` (None: do not cache) and return it.
+	"""
+	global _EMB_STATE
+	if key is not None:
+		with _EMB_LOCK:
+			_EMB_STATE = (key, matrix, ids, scales)
+	return matrix, ids, scales
+
+
+def _db_main_path(conn: sqlite3.Connection) -> str:
+	for row in conn.execute("PRAGMA database_list"):
+		if row[1] == "main":
+			return row[2]
+	return ""
+
+
+def _embedding_version(conn: sqlite3.Connection) -> Tuple[int, int]:
+	"""
+	Return (token, version): the database's random token and its embedding
+	write counter.
+	"""
+	row = conn.execute("SELECT token, version FROM embedding_version WHERE id = 0").fetchone()
+	return (row[0] or 0, row[1]) if row is not None else (0, 0)
+
+
+# Sidecar layout: an int64 header (_SIDECAR_HEADER fields), then N records of
+# (int64 memory id, float32[dim] row). Interleaving keeps appends to a single
+# write at the end of the file; the matrix is a strided view of the records,
+# which BLAS reads without copying.
+_SIDECAR_MAGIC = 0x3233466D65  # "emF32"
+_SIDECAR_HEADER = ("magic", "db_token", "embedding_version", "n", "dim", "model_crc")
+_SIDECAR_HEADER_BYTES = 8 * len(_SIDECAR_HEADER)
+# Records per write when dumping a full matrix, bounding the temporary copy.
+_SIDECAR_WRITE_BLOCK = 4096
+
+
+def _sidecar_path(db_path: str) -> Optional[str]:
+	return db_path + ".emb.f32" if db_path else None
+
+
+def _sidecar_record_dtype(dim: int) -> np.dtype:
+	return np.dtype([("id", "<i8"), ("vec", "<f4", (dim,))])
+
+
+def _sidecar_header(version: Tuple[int, int], n: int, dim: int) -> bytes:
+	crc = zlib.crc32(EMBEDDING_MODEL.encode("utf-8"))
+	return np.array([_SIDECAR_MAGIC, *version, n, dim, crc], dtype=np.int64).tobytes()
+
+
+def _sidecar_records(ids: np.ndarray, matrix: np.ndarray) -> bytes:
+	records = np.empty(len(ids), dtype=_sidecar_record_dtype(matrix.shape[1]))
+	records["id"] = ids
+	records["vec"] = matrix
+	return records.tobytes()
+
+
+def _read_matrix_sidecar(
+	path: str, version: Tuple[int, int], dim: int
+) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+	"""
+	Memory-map (matrix, ids) from the sidecar at `path`, or return None if it
+	is missing, truncated or was written for other embeddings (including
+	those of an earlier database at the same path). `version` is the
+	(token, version) pair from _embedding_version.
+	"""
+	# Header check, size check and mapping all use one open file: the path
+	# may be swapped by another writer's os.replace at any moment.
+	try:
+		with open(path, "rb") as f:
+			header = f.read(_SIDECAR_HEADER_BYTES)
+			if len(header) != _SIDECAR_HEADER_BYTES:
+				return None
+			n = int(np.frombuffer(header, dtype=np.int64)[3])
+			if n <= 0 or header != _sidecar_header(version, n, dim):
+				return None
+			dtype = _sidecar_record_dtype(dim)
+			# Bytes past the last record belong to an append still in progress.
+			if os.fstat(f.fileno()).st_size < _SIDECAR_HEADER_BYTES + n * dtype.itemsize:
+				return None
+			records = np.memmap(f, dtype=dtype, mode="r", offset=_SIDECAR_HEADER_BYTES, shape=(n,))
+	except (OSError, ValueError):
+		return None
+	return records["vec"], records["id"]
+
+
+def _write_matrix_sidecar(
+	path: str, version: Tuple[int, int], matrix: np.ndarray, ids: np.ndarray
+) -> bool:
+	"""
+	Atomically replace the sidecar at `path` with `matrix` and `ids`.
+	"""
+	n, dim = matrix.shape
+	tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+	try:
+		with open(tmp_path, "wb") as f:
+			f.write(_sidecar_header(version, n, dim))
+			for start in range(0, n, _SIDECAR_WRITE_BLOCK):
+				stop = start + _SIDECAR_WRITE_BLOCK
+				f.write(_sidecar_records(ids[start:stop], matrix[start:stop]))
+		os.replace(tmp_path, path)
+	except OSError:
+		try:
+			os.remove(tmp_path)
+		except OSError:
+			pass
+		return False
+	return True
+
+
+def _append_matrix_sidecar(
+	path: str,
+	before: Tuple[int, int],
+	after: Tuple[int, int],
+	n: int,
+	ids: np.ndarray,
+	rows: np.ndarray,
+) -> bool:
+	"""
+	Append records to a sidecar holding exactly `n` rows at version `before`
+	and relabel it as `after`. Records are written before the header, so a
+	concurrent reader sees either the old or the new row count, both valid.
+	"""
+	dim = rows.shape[1]
+	offset = _SIDECAR_HEADER_BYTES + n * _sidecar_record_dtype(dim).itemsize
+	try:
+		with open(path, "r+b") as f:
+			if f.read(_SIDECAR_HEADER_BYTES) != _sidecar_header(before, n, dim):
+				return False
+			f.seek(offset)
+			f.write(_sidecar_records(ids, rows))
+			f.truncate()
+			f.flush()
+			f.seek(0)
+			f.write(_sidecar_header(after, n + len(ids), dim))
+	except OSError:
+		return False
+	return True
+
+
+def _load_embedding_matrix(
+	conn: sqlite3.Connection, dim: int
+) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+	"""
+	Return (matrix, ids, scales) for all stored embeddings of the configured
+	model with the given dimension. Rows of the (N, dim) matrix are
+	L2-normalized (vectors are normalized at write time; older rows are
+	normalized here), so cosine similarity against a normalized query is a
+	plain dot product. `scales` is None for a float32 matrix and holds one
+	scale per row when EMBEDDING_QUANTIZE=int8; see _score_embeddings.
+
+	Float32 matrices are memory-mapped read-only from the `<db>.emb.f32`
+	sidecar when it matches the current embedding_version, so processes
+	sharing a database share its pages. A matrix rebuilt from SQLite is
+	cached in memory; callers write the sidecar with
+	_persist_embedding_matrix once their transaction has committed.
+	"""
+	quantize = EMBEDDING_QUANTIZE == "int8"
+	db_path = _db_main_path(conn)
+	version = _embedding_version(conn)
+	key = (db_path, version, EMBEDDING_MODEL, dim, quantize)
+	with _EMB_LOCK:
+		state = _EMB_STATE
+	if state is not None and state[0] == key:
+		return state[1], state[2], state[3]
+
+	sidecar = None if quantize else _sidecar_path(db_path)
+	if sidecar is not None:
+		mapped = _read_matrix_sidecar(sidecar, version, dim)
+		if mapped is not None:
+			return _publish_embedding_matrix(key, mapped[0], mapped[1], None)
+
+	cursor = conn.execute(
+		"""
+    SELECT memory_id, embedding, normalized, embedding_q, scale
+    FROM memory_embeddings
+    WHERE model = ? AND (dim = ? OR dim IS NULL)
+    """,
+		(EMBEDDING_MODEL, dim),
+	)
+	ids: List[int] = []
+	vecs: List[np.ndarray] = []
+	scales: List[float] = []
+	for memory_id, raw, normalized, raw_q, scale in cursor:
+		has_q = raw_q is not None and scale is not None and len(raw_q) == dim
+		if quantize and normalized and has_q:
+			ids.append(memory_id)
+			vecs.append(np.frombuffer(raw_q, dtype=np.int8))
+			scales.append(scale)
+			continue
+		vec = _decode_embedding(raw)
+		if vec is None or vec.size != dim:
+			continue
+		if not normalized or not isinstance(raw, (bytes, memoryview)):
+			vec = _normalize_vector(vec)
+		if quantize:
+			vec, scale = _quantize_int8(vec)
+			scales.append(scale)
+		ids.append(memory_id)
+		vecs.append(vec)
+
+	dtype = np.int8 if quantize else np.float32
+	if vecs:
+		matrix = np.vstack(vecs).astype(dtype, copy=False)
+	else:
+		matrix = np.empty((0, dim), dtype=dtype)
+
+	id_array = np.asarray(ids, dtype=np.int64)
+	scale_array = np.asarray(scales, dtype=np.float32) if quantize else None
+	# Rows may have been read outside a transaction; only cache the result if
+	# no embedding was written meanwhile.
+	if _embedding_version(conn) != version:
+		return _publish_embedding_matrix(None, matrix, id_array, scale_array)
+	return _publish_embedding_matrix(key, matrix, id_array, scale_array)
+
+
+def _persist_embedding_matrix() -> None:
+	"""
+	Write the cached float32 matrix to its sidecar and switch the cache to the
+	memory-mapped copy. A no-op if the cache is already mapped, quantized or
+	empty. Call outside write transactions: this writes the whole matrix.
+	"""
+	global _EMB_STATE
+	with _EMB_LOCK:
+		state = _EMB_STATE
+	if state is None or state[3] is not None or isinstance(state[1], np.memmap):
+		return
+	key, matrix, ids, _ = state
+	db_path, version, _, dim, _ = key
+	sidecar = _sidecar_path(db_path)
+	if sidecar is None or ids.size == 0 or not _write_matrix_sidecar(sidecar, version, matrix, ids):
+		return
+	mapped = _read_matrix_sidecar(sidecar, version, dim)
+	if mapped is None:
+		return
+	with _EMB_LOCK:
+		if _EMB_STATE is state:
+			_EMB_STATE = (key, mapped[0], mapped[1], None)
+
+
+def _append_embedding_matrix(conn: sqlite3.Connection, appended: Optional[tuple]) -> None:
+	"""
+	Add rows written by _store_embeddings to the cached matrix (and its
+	sidecar) after the writing transaction has committed, instead of
+	rebuilding from SQLite on the next search. Drops the cache if it does not
+	describe the database as it was right before those rows were written.
+	"""
+	global _EMB_STATE
+	with _EMB_LOCK:
+		state = _EMB_STATE
+	if appended is None or state is None:
+		return
+	before, after, new_ids, rows = appended
+	quantize = EMBEDDING_QUANTIZE == "int8"
+	db_path = _db_main_path(conn)
+	dim = rows.shape[1]
+	if state[0] != (db_path, before, EMBEDDING_MODEL, dim, quantize):
+		_invalidate_embedding_matrix()
+		return
+
+	_, matrix, ids, scales = state
+	new_ids = np.asarray(new_ids, dtype=np.int64)
+	if quantize:
+		quantized = [_quantize_int8(row) for row in rows]
+		matrix = np.concatenate([matrix, np.vstack([q for q, _ in quantized])])
+		scales = np.concatenate([scales, np.asarray([s for _, s in quantized], dtype=np.float32)])
+		ids = np.concatenate([ids, new_ids])
+	else:
+		sidecar = _sidecar_path(db_path)
+		mapped = None
+		if sidecar is not None and isinstance(matrix, np.memmap):
+			if _append_matrix_sidecar(sidecar, before, after, ids.size, new_ids, rows):
+				mapped = _read_matrix_sidecar(sidecar, after, dim)
+		if mapped is not None:
+			matrix, ids = mapped
+		else:
+			# Not mapped (or the sidecar moved on): extend in memory and let
+			# _persist_embedding_matrix rewrite the file.
+			matrix = np.concatenate([np.asarray(matrix), rows])
+			ids = np.concatenate([np.asarray(ids), new_ids])
+	with _EMB_LOCK:
+		if _EMB_STATE is state:
+			_EMB_STATE = ((db_path, after, EMBEDDING_MODEL, dim, quantize), matrix, ids, scales)
+		else:
+			_EMB_STATE = None
+
+
+def _build_numba_dot() -> Optional[Callable[[np.ndarray, np.ndarray], np.ndarray]]:
+	"""
+	Compile the parallel row-wise dot-product kernel, or return None if numba
+	is not installed. numba is only imported here, so it costs nothing unless
+	EMBEDDING_KERNEL=numba.
+	"""
+	try:
+		from numba import njit, prange
+	except ImportError:
+		return None
+
+	@njit(parallel=True, fastmath=True, cache=True)
+	def numba_dot(matrix, q):
+		n, d = matrix.shape
+		out = np.empty(n, np.float32)
+		for i in prange(n):
+			s = np.float32(0.0)
+			for j in range(d):
+				s += matrix[i, j] * q[j]
+			out[i] = s
+		return out
+
+	return numba_dot
+
+
+_numba_dot = _build_numba_dot() if EMBEDDING_KERNEL == "numba" else None
+
+
+def _score_embeddings(
+	matrix: np.ndarray, scales: Optional[np.ndarray], q: np.ndarray
+) -> np.ndarray:
+	"""
+	Cosine similarity of the normalized query `q` against every matrix row.
+	Float32 matrices use one BLAS matrix-vector product; int8 matrices are
+	widened to float32 block by block so they also go through BLAS, and the
+	integer dot products are rescaled by the row and query scales.
+	"""
+	if scales is None:
+		if _numba_dot is not None:
+			# Sidecar matrices are strided views; numba reads them in place.
+			return _numba_dot(np.asarray(matrix), np.ascontiguousarray(q))
+		return matrix @ q
+	q_q, q_scale = _quantize_int8(q)
+	q_wide = q_q.astype(np.float32)
+	raw = np.empty(matrix.shape[0], dtype=np.float32)
+	for start in range(0, matrix.shape[0], _INT8_SCORE_BLOCK):
+		block = matrix[start : start + _INT8_SCORE_BLOCK]
+		raw[start : start + block.shape[0]] = block.astype(np.float32) @ q_wide
+	return raw * (scales * np.float32(q_scale))
+
+
+# In-process LRU in front of the persistent embedding_cache table, keyed the
+# same way, so repeated texts within a session skip both SQLite and the API.
+_EMBED_MEMO: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+_EMBED_MEMO_MAXSIZE = 1024
+_EMBED_MEMO_LOCK = threading.Lock()
+
+
+def _embedding_cache_key(text: str) -> bytes:
+	return hashlib.sha256(f"{EMBEDDING_MODEL}\0{text}".encode("utf-8")).digest()
+
+
+def _memo_get(key: bytes) -> Optional[np.ndarray]:
+	with _EMBED_MEMO_LOCK:
+		vec = _EMBED_MEMO.get(key)
+		if vec is not None:
+			_EMBED_MEMO.move_to_end(key)
+		return vec
+
+
+def _memo_put(key: bytes, vec: np.ndarray) -> None:
+	with _EMBED_MEMO_LOCK:
+		_EMBED_MEMO[key] = vec
+		_EMBED_MEMO.move_to_end(key)
+		while len(_EMBED_MEMO) > _EMBED_MEMO_MAXSIZE:
+			_EMBED_MEMO.popitem(last=False)
+
+
+def _get_embedding(conn: sqlite3.Connection, text: str) -> Optional[np.ndarray]:
+	"""
+	Return the float32 embedding for `text`, or None when no embedding backend
+	is configured or the call fails. See `_get_embeddings`.
+	"""
+	return _get_embeddings(conn, [text])[0]
+
+
+def _get_embeddings(
+	conn: sqlite3.Connection, texts: List[str]
+) -> List[Optional[np.ndarray]]:
+	"""
+	Return float32 embeddings for `texts`, in order. Each text is looked up in
+	the in-process LRU and then the persistent embedding_cache table; all
+	remaining texts are embedded with a single batched provider call. Fresh
+	provider results are written to the cache on `conn`; the caller commits.
+	Entries are None where no embedding could be produced.
+	"""
+	return _prefetch_embeddings(conn, texts)()
+
+
+def _write_cache(conn: sqlite3.Connection, write: Callable[[], None]) -> bool:
+	"""
+	Run `write` (writes to caches or the sqlite-vec index on `conn`) without
+	waiting for the database write lock: if another connection holds it, the
+	writes are rolled back and skipped, since derived data is never worth
+	blocking or failing the caller. Returns whether the writes were applied.
+	"""
+	timeout = conn.execute("PRAGMA busy_timeout").fetchone()[0]
+	conn.execute("PRAGMA busy_timeout = 0")
+	# Outside a transaction the savepoint starts (and RELEASE commits) its own.
+	conn.execute("SAVEPOINT cache_write")
+	try:
+		write()
+	except sqlite3.OperationalError:
+		conn.execute("ROLLBACK TO cache_write")
+		return False
+	finally:
+		conn.execute("RELEASE cache_write")
+		conn.execute(f"PRAGMA busy_timeout = {int(timeout)}")
+	return True
+
+
+# Background workers for provider calls, so network latency overlaps with
+# database writes on the calling thread.
+_EMBED_EXEC = ThreadPoolExecutor(max_workers=4, thread_name_prefix="embed")
+
+
+def _prefetch_embeddings(
+	conn: sqlite3.Connection, texts: List[str]
+) -> Callable[[], List[Optional[np.ndarray]]]:
+	"""
+	Start resolving embeddings for `texts` (see `_get_embeddings`): cache hits
+	are read now and any misses are sent to the provider on _EMBED_EXEC. The
+	returned function waits for the provider, writes fresh vectors to the
+	cache on `conn` (skipped if the database is locked), and returns the
+	embeddings in order. Call it on the thread that owns `conn`.
+	"""
+	keys = [_embedding_cache_key(text) for text in texts]
+	found: dict = {}
+	for key in keys:
+		if key in found:
+			continue
+		vec = _memo_get(key)
+		if vec is None:
+			row = conn.execute(_SELECT_EMB_CACHE_SQL, (key,)).fetchone()
+			if row is not None:
+				vec = np.frombuffer(row[0], dtype=np.float32)
+				_memo_put(key, vec)
+		if vec is not None:
+			found[key] = vec
+
+	missing: dict = {}
+	for key, text in zip(keys, texts):
+		if key not in found:
+			missing.setdefault(key, text)
+
+	future = _EMBED_EXEC.submit(_embed_texts, list(missing.values())) if missing else None
+
+	def finish() -> List[Optional[np.ndarray]]:
+		if future is not None:
+			raw_vecs = future.result()
+			if raw_vecs is not None and len(raw_vecs) == len(missing):
+				cache_rows = []
+				for key, raw in zip(missing, raw_vecs):
+					vec = np.asarray(raw, dtype=np.float32)
+					found[key] = vec
+					_memo_put(key, vec)
+					cache_rows.append((key, EMBEDDING_MODEL, vec.tobytes()))
+				_write_cache(conn, lambda: conn.executemany(_INSERT_EMB_CACHE_SQL, cache_rows))
+		return [found.get(key) for key in keys]
+
+	return finish
+
+
+def _fts_match_query(query: str) -> Optional[str]:
+	"""
+	Build an FTS5 MATCH expression from free text: every whitespace-separated
+	token is quoted (so punctuation and FTS operators are taken literally) and
+	prefix-matched, and all tokens must match. Returns None if no token
+	contains a searchable character.
+	"""
+	terms = []
+	for token in str(query).split():
+		if not any(ch.isalnum() for ch in token):
+			continue
+		terms.append('"' + token.replace('"', '""') + '"*')
+	if not terms:
+		return None
+	return " ".join(terms)
 
 
 def _search_memories_keyword(
@@ -198,17 +1253,20 @@ def _search_memories_keyword(
 	tags_any: Optional[Set[str]] = None,
 	source_prefix: Optional[str] = None,
 ) -> List[sqlite3.Row]:
-	cursor = conn.execute(
-		"""
-    SELECT id, created_at, title, content, tags, source
-    FROM memories
-    WHERE content LIKE ? OR IFNULL(title, '') LIKE ?
-    ORDER BY datetime(created_at) DESC, id DESC
-    """,
-		(f"%{query}%", f"%{query}%"),
-	)
-	rows = cursor.fetchall()
-	return _apply_memory_filters(rows, limit, tags_any, source_prefix)
+	match = _fts_match_query(query)
+	if match is None:
+		return []
+	# With filters, rows are filtered in Python, so the SQL limit is lifted.
+	sql_limit = limit if tags_any is None and source_prefix is None else -1
+	cursor = conn.execute(_SEARCH_KW_SQL, (match, sql_limit))
+	rows = _apply_memory_filters(cursor, limit, tags_any, source_prefix)
+	if not rows and not str(query).isascii():
+		# unicode61 only splits on whitespace and punctuation, so a word inside
+		# unspaced text (e.g. Japanese or Chinese) is not a token of its own.
+		pattern = f"%{str(query).strip()}%"
+		cursor = conn.execute(_SEARCH_KW_LIKE_SQL, (pattern, pattern, sql_limit))
+		rows = _apply_memory_filters(cursor, limit, tags_any, source_prefix)
+	return rows
 
 
 def _fetch_latest_memories(
@@ -220,16 +1278,15 @@ def _fetch_latest_memories(
 	"""
 	Return the most recently created memories, newest first.
 	"""
-	cursor = conn.execute(
-		"""
-    SELECT id, created_at, title, content, tags, source
-    FROM memories
-    ORDER BY datetime(created_at) DESC, id DESC
-    """,
-		(),
-	)
-	rows = cursor.fetchall()
-	return _apply_memory_filters(rows, limit, tags_any, source_prefix)
+	# With filters, rows are filtered in Python, so the SQL limit is lifted.
+	sql_limit = limit if tags_any is None and source_prefix is None else -1
+	cursor = conn.execute(_LATEST_MEM_SQL, (sql_limit,))
+	return _apply_memory_filters(cursor, limit, tags_any, source_prefix)
+
+
+# Upper bound on ids per `WHERE id IN (...)` lookup, well below SQLite's
+# host-parameter limit.
+_ID_FETCH_CHUNK = 500
 
 
 def _search_memories_vector(
@@ -239,57 +1296,335 @@ def _search_memories_vector(
 	tags_any: Optional[Set[str]] = None,
 	source_prefix: Optional[str] = None,
 ) -> List[sqlite3.Row]:
-	query_embedding = _embed_text(query)
+	query_embedding = _get_embedding(conn, query)
 	if query_embedding is None:
 		# Fallback to keyword search if embeddings are not configured.
 		return _search_memories_keyword(conn, query, limit, tags_any, source_prefix)
 
-	# Load all embeddings for this model.
+	q = np.asarray(query_embedding, dtype=np.float32)
+	q_norm = float(np.linalg.norm(q))
+	if q.ndim != 1 or q_norm == 0.0:
+		return _search_memories_keyword(conn, query, limit, tags_any, source_prefix)
+	q = q / q_norm
+
+	params = _query_cache_params(limit, tags_any, source_prefix)
+	cached_ids = _lookup_query_cache(conn, q, params)
+	if cached_ids is not None:
+		return _fetch_memories_by_ids(conn, cached_ids)
+
+	rows = _rank_memories_by_vector(conn, query, q, limit, tags_any, source_prefix)
+	_store_query_cache(conn, q, params, [row["id"] for row in rows])
+	return rows
+
+
+def _rank_memories_by_vector(
+	conn: sqlite3.Connection,
+	query: str,
+	q: np.ndarray,
+	limit: int,
+	tags_any: Optional[Set[str]] = None,
+	source_prefix: Optional[str] = None,
+) -> List[sqlite3.Row]:
+	if _vec_enabled(conn) and _sync_vec_index(conn, q.shape[0]):
+		return _search_memories_hybrid(conn, query, q, limit, tags_any, source_prefix)
+
+	matrix, ids, scales = _load_embedding_matrix(conn, q.shape[0])
+	if ids.size == 0:
+		# If we have no stored embeddings yet, fall back to keyword search
+		# rather than returning an empty result set.
+		return _search_memories_keyword(conn, query, limit, tags_any, source_prefix)
+
+	scores = _score_embeddings(matrix, scales, q)
+
+	if tags_any is None and source_prefix is None:
+		top = _top_k_indices(scores, limit)
+		return _fetch_memories_by_ids(conn, ids[top].tolist())
+
+	# With filters, take progressively larger top-k slices in similarity order
+	# until enough rows match; most searches never rank the full set.
+	matched: List[sqlite3.Row] = []
+	seen: Set[int] = set()
+	k = limit
+	while len(matched) < limit and len(seen) < scores.size:
+		k = min(k * 4, scores.size)
+		candidates = [
+			memory_id
+			for memory_id in ids[_top_k_indices(scores, k)].tolist()
+			if memory_id not in seen
+		]
+		seen.update(candidates)
+		for start in range(0, len(candidates), _ID_FETCH_CHUNK):
+			rows = _fetch_memories_by_ids(conn, candidates[start : start + _ID_FETCH_CHUNK])
+			matched.extend(
+				_apply_memory_filters(rows, limit - len(matched), tags_any, source_prefix)
+			)
+			if len(matched) >= limit:
+				break
+	return matched
+
+
+# Cosine similarity above which a cached query's results are reused.
+_SEMANTIC_CACHE_THRESHOLD = 0.97
+
+
+def _query_cache_params(
+	limit: int, tags_any: Optional[Set[str]], source_prefix: Optional[str]
+) -> str:
+	return json.dumps(
+		{
+			"limit": limit,
+			"tags_any": sorted(tags_any) if tags_any is not None else None,
+			"source_prefix": source_prefix,
+		},
+		sort_keys=True,
+	)
+
+
+def _lookup_query_cache(
+	conn: sqlite3.Connection, q: np.ndarray, params: str
+) -> Optional[List[int]]:
+	"""
+	Return cached result ids for a fresh query_cache entry with the same
+	parameters whose embedding has cosine similarity above
+	_SEMANTIC_CACHE_THRESHOLD with the normalized query `q`, else None.
+	"""
+	if SEMANTIC_CACHE_TTL_SECONDS <= 0:
+		return None
 	cursor = conn.execute(
 		"""
-    SELECT
-      e.memory_id,
-      e.embedding,
-      m.id,
-      m.created_at,
-      m.title,
-      m.content,
-      m.tags,
-      m.source
-    FROM memory_embeddings e
-    JOIN memories m ON m.id = e.memory_id
-    WHERE e.model = ?
+    SELECT embedding, result_ids
+    FROM query_cache
+    WHERE model = ? AND params = ? AND created_at >= datetime('now', ?)
     """,
-		(EMBEDDING_MODEL,),
+		(EMBEDDING_MODEL, params, f"-{SEMANTIC_CACHE_TTL_SECONDS} seconds"),
 	)
-	rows = cursor.fetchall()
+	entries = [row for row in cursor if len(row[0]) == q.nbytes]
+	if not entries:
+		return None
+	cached = np.vstack([np.frombuffer(row[0], dtype=np.float32) for row in entries])
+	sims = cached @ q
+	best = int(np.argmax(sims))
+	if float(sims[best]) <= _SEMANTIC_CACHE_THRESHOLD:
+		return None
+	return np.frombuffer(entries[best][1], dtype=np.int64).tolist()
 
-	if not rows:
-		# If we have no stored embeddings yet, fall back to keyword search
-		# rather than returning an empty result set.
-		return _search_memories_keyword(conn, query, limit, tags_any, source_prefix)
 
-	# Compute cosine similarity in Python.
-	scores: List[Tuple[int, float]] = []
-	id_to_row: dict[int, sqlite3.Row] = {}
-	for row in rows:
-		if not _row_matches_filters(row, tags_any, source_prefix):
-			continue
-		try:
-			vec = json.loads(row["embedding"])
-			score = _cosine_similarity(query_embedding, vec)
-		except Exception:
-			continue
-		scores.append((row["memory_id"], score))
-		id_to_row[row["memory_id"]] = row
+def _store_query_cache(
+	conn: sqlite3.Connection, q: np.ndarray, params: str, result_ids: List[int]
+) -> None:
+	if SEMANTIC_CACHE_TTL_SECONDS <= 0:
+		return
+	ttl = f"-{SEMANTIC_CACHE_TTL_SECONDS} seconds"
+
+	def write() -> None:
+		conn.execute("DELETE FROM query_cache WHERE created_at < datetime('now', ?)", (ttl,))
+		conn.execute(
+			"INSERT INTO query_cache (model, params, embedding, result_ids) VALUES (?, ?, ?, ?)",
+			(
+				EMBEDDING_MODEL,
+				params,
+				q.astype(np.float32).tobytes(),
+				np.asarray(result_ids, dtype=np.int64).tobytes(),
+			),
+		)
+
+	_write_cache(conn, write)
+
+
+# Cosine similarity above which save_memory treats new content as a duplicate.
+_DEDUPE_THRESHOLD = 0.95
+
+
+def _find_duplicate(conn: sqlite3.Connection, vec: np.ndarray) -> Optional[int]:
+	"""
+	Return the id of the stored memory most similar to `vec` if its cosine
+	similarity exceeds _DEDUPE_THRESHOLD, else None.
+	"""
+	q = _normalize_vector(vec)
+	matrix, ids, scales = _load_embedding_matrix(conn, q.size)
+	if ids.size == 0:
+		return None
+	sims = _score_embeddings(matrix, scales, q)
+	best = int(np.argmax(sims))
+	if float(sims[best]) <= _DEDUPE_THRESHOLD:
+		return None
+	return int(ids[best])
+
+
+def _top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+	"""
+	Indices of the `k` highest scores, best first. Uses an O(N) argpartition
+	and sorts only the selected slice.
+	"""
+	k = min(k, scores.size)
+	if k <= 0:
+		return np.empty(0, dtype=np.intp)
+	if k < scores.size:
+		idx = np.argpartition(-scores, k - 1)[:k]
+	else:
+		idx = np.arange(scores.size)
+	return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+# Reciprocal Rank Fusion constant: score = sum(1 / (_RRF_K + rank)).
+_RRF_K = 60
+# Candidates taken from each ranker before fusion, and the vec0 KNN ceiling
+# used when rows must be filtered in Python afterwards.
+_HYBRID_CANDIDATES = 50
+_VEC_MAX_K = 4096
+
 
-	# Sort by similarity descending and take top N ids.
-	scores.sort(key=lambda item: item[1], reverse=True)
-	top_ids = [memory_id for memory_id, _ in scores[:limit] if memory_id is not None]
+def _vec_index_dim(conn: sqlite3.Connection) -> Optional[int]:
+	"""
+	Return the dimension of the memory_vec index, or None if it does not exist
+	or sqlite-vec is not loaded on this connection.
+	"""
+	row = conn.execute(
+		"SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'memory_vec'"
+	).fetchone()
+	if row is None or not _vec_enabled(conn):
+		return None
+	match = re.search(r"float\[(\d+)\]", row[0] or "")
+	return int(match.group(1)) if match else None
+
+
+def _sync_vec_index(conn: sqlite3.Connection, dim: int) -> bool:
+	"""
+	Create the sqlite-vec `memory_vec` index on first use and bring it in line
+	with memory_embeddings: re-index ids listed in vec_index_pending, add
+	missing vectors and drop rows whose embedding is gone. The scan is skipped
+	while embedding_version and the model match vec_index_state. Returns False
+	if an existing index has a different dimension, or if it is stale and
+	another connection holds the write lock.
+	"""
+	existing = _vec_index_dim(conn)
+	version = _embedding_version(conn)[1]
+	if existing is not None:
+		if existing != dim:
+			return False
+		state = conn.execute(
+			"SELECT embedding_version, model FROM vec_index_state WHERE id = 0"
+		).fetchone()
+		if state is not None and tuple(state) == (version, EMBEDDING_MODEL):
+			return True
+
+	def write() -> None:
+		if existing is None:
+			conn.execute(
+				f"CREATE VIRTUAL TABLE IF NOT EXISTS memory_vec USING vec0("
+				f"embedding float[{int(dim)}] distance_metric=cosine)"
+			)
+		# vec0 has no INSERT OR REPLACE: drop changed vectors so the insert
+		# below re-adds them from memory_embeddings.
+		conn.execute(
+			"DELETE FROM memory_vec WHERE rowid IN (SELECT memory_id FROM vec_index_pending)"
+		)
+		conn.execute("DELETE FROM vec_index_pending")
+		conn.execute(
+			"""
+    DELETE FROM memory_vec
+    WHERE rowid NOT IN (
+      SELECT memory_id FROM memory_embeddings WHERE model = ? AND dim = ?
+    )
+    """,
+			(EMBEDDING_MODEL, dim),
+		)
+		conn.execute(
+			"""
+    INSERT INTO memory_vec(rowid, embedding)
+    SELECT memory_id, embedding
+    FROM memory_embeddings
+    WHERE model = ? AND dim = ? AND memory_id NOT IN (SELECT rowid FROM memory_vec)
+    """,
+			(EMBEDDING_MODEL, dim),
+		)
+		conn.execute(
+			"INSERT OR REPLACE INTO vec_index_state (id, embedding_version, model) VALUES (0, ?, ?)",
+			(version, EMBEDDING_MODEL),
+		)
 
-	if not top_ids:
+	return _write_cache(conn, write)
+
+
+def _search_memories_hybrid(
+	conn: sqlite3.Connection,
+	query: str,
+	q: np.ndarray,
+	limit: int,
+	tags_any: Optional[Set[str]] = None,
+	source_prefix: Optional[str] = None,
+) -> List[sqlite3.Row]:
+	"""
+	Rank memories by fusing sqlite-vec KNN and FTS5 BM25 results with
+	Reciprocal Rank Fusion, all in one SQL statement.
+	"""
+	filtered = tags_any is not None or source_prefix is not None
+	k = _VEC_MAX_K if filtered else max(limit, _HYBRID_CANDIDATES)
+	match = _fts_match_query(query)
+
+	params: list = [q.astype(np.float32).tobytes(), k]
+	ranked = "SELECT id, rank FROM vec_matches"
+	fts_cte = ""
+	if match is not None:
+		fts_cte = """,
+    fts_matches AS (
+      SELECT rowid AS id, row_number() OVER (ORDER BY bm25(memories_fts)) AS rank
+      FROM memories_fts
+      WHERE memories_fts MATCH ?
+      ORDER BY memories_fts.rank
+      LIMIT ?
+    )"""
+		ranked += " UNION ALL SELECT id, rank FROM fts_matches"
+		params += [match, k]
+	params += [_RRF_K, -1 if filtered else limit]
+
+	cursor = conn.execute(
+		f"""
+    WITH vec_matches AS (
+      SELECT rowid AS id, row_number() OVER (ORDER BY distance) AS rank
+      FROM memory_vec
+      WHERE embedding MATCH ? AND k = ?
+    ){fts_cte},
+    fused AS (
+      SELECT id, SUM(1.0 / (? + rank)) AS score
+      FROM ({ranked})
+      GROUP BY id
+    )
+    SELECT m.id, m.created_at, m.title, m.content, m.tags, m.source
+    FROM fused
+    JOIN memories m ON m.id = fused.id
+    ORDER BY fused.score DESC, m.id DESC
+    LIMIT ?
+    """,
+		params,
+	)
+	return _apply_memory_filters(cursor, limit, tags_any, source_prefix)
+
+
+def _fetch_memories_by_ids(
+	conn: sqlite3.Connection, memory_ids: List[int]
+) -> List[sqlite3.Row]:
+	"""
+	Fetch memory rows for the given ids, preserving the order of `memory_ids`.
+	Ids without a matching row are skipped.
+	"""
+	if not memory_ids:
 		return []
-	return [id_to_row[memory_id] for memory_id in top_ids if memory_id in id_to_row]
+	memory_ids = [int(memory_id) for memory_id in memory_ids]
+	placeholders = ",".join("?" for _ in memory_ids)
+	# Ids are ints, so inlining them in the CASE ranking is safe.
+	cases = " ".join(f"WHEN {memory_id} THEN {pos}" for pos, memory_id in enumerate(memory_ids))
+	cursor = conn.execute(
+		f"""
+    SELECT id, created_at, title, content, tags, source
+    FROM memories
+    WHERE id IN ({placeholders})
+    ORDER BY CASE id {cases} END
+    LIMIT ?
+    """,
+		[*memory_ids, len(memory_ids)],
+	)
+	return cursor.fetchall()
 
 
 def _normalize_tag_filter(tags_any: Optional[List[str]]) -> Optional[Set[str]]:
@@ -323,7 +1658,7 @@ def _row_matches_filters(
 	if tags_any is not None:
 		raw_tags = row["tags"]
 		try:
-			stored_tags = json.loads(raw_tags) if raw_tags else []
+			stored_tags = _json_loads(raw_tags) if raw_tags else []
 		except json.JSONDecodeError:
 			stored_tags = []
 		stored_tag_set = {
@@ -338,13 +1673,17 @@ def _row_matches_filters(
 
 
 def _apply_memory_filters(
-	rows: List[sqlite3.Row],
+	rows: Iterable[sqlite3.Row],
 	limit: int,
 	tags_any: Optional[Set[str]],
 	source_prefix: Optional[str],
 ) -> List[sqlite3.Row]:
+	"""
+	Return up to `limit` rows passing the filters. `rows` may be a cursor; it
+	is consumed only until `limit` matches are found.
+	"""
 	if tags_any is None and source_prefix is None:
-		return rows[:limit]
+		return list(islice(rows, limit))
 	matched: List[sqlite3.Row] = []
 	for row in rows:
 		if _row_matches_filters(row, tags_any, source_prefix):
@@ -400,6 +1739,7 @@ def save_memory(
 	source: Optional[str] = None,
 	dbUrl: Optional[str] = None,
 	generate_embedding: bool = True,
+	dedupe: bool = True,
 ) -> dict:
 	"""
 	Save a memory snippet into a local SQLite database.
@@ -410,37 +1750,61 @@ def save_memory(
 	- source: optional identifier for where this memory came from
 	- dbUrl: optional database URL or path (file: URL or filesystem path).
 	- generate_embedding: whether to generate and store an embedding (requires OPENAI_API_KEY).
+	- dedupe: if True (default) and an embedding is available, skip saving when an existing
+	  memory is a near-duplicate (cosine similarity > 0.95) and return that memory instead,
+	  with `duplicate` set to True.
 	"""
+	duplicate_row: Optional[sqlite3.Row] = None
+	appended = None
 	conn = _get_connection(dbUrl)
-	try:
+	with conn:
+		# Request the embedding first so the API call overlaps the INSERT.
+		embedding = _prefetch_embeddings(conn, [content]) if generate_embedding else None
+
 		cursor = conn.execute(
-			"INSERT INTO memories (content, title, tags, source) VALUES (?, ?, ?, ?)",
+			_INSERT_MEM_SQL,
 			(
 				content,
 				title,
-				json.dumps(tags or []),
+				_json_dumps(tags or []),
 				source,
 			),
 		)
 		memory_id = cursor.lastrowid
 
-		if generate_embedding:
+		vec = None
+		if embedding is not None:
 			try:
-				vec = _embed_text(content)
-				if vec is None:
-					raise RuntimeError("Embedding backend not configured")
-
-				conn.execute(
-					"INSERT OR REPLACE INTO memory_embeddings (memory_id, model, embedding) VALUES (?, ?, ?)",
-					(memory_id, EMBEDDING_MODEL, json.dumps(vec)),
-				)
+				vec = embedding()[0]
 			except Exception:
 				# If embedding fails, still keep the textual memory.
 				pass
 
-		conn.commit()
-	finally:
-		conn.close()
+		if vec is not None:
+			duplicate_id = _find_duplicate(conn, vec) if dedupe else None
+			if duplicate_id is not None:
+				duplicate_row = _get_memory_row(conn, duplicate_id)
+			if duplicate_row is not None:
+				# The INSERT already ran alongside the embedding request; undo it.
+				conn.execute("DELETE FROM memories WHERE id = ?", (memory_id,))
+			else:
+				appended = _store_embedding(conn, memory_id, vec)
+	_append_embedding_matrix(conn, appended)
+	_persist_embedding_matrix()
+
+	if duplicate_row is not None:
+		try:
+			duplicate_tags = _json_loads(duplicate_row["tags"]) if duplicate_row["tags"] else []
+		except json.JSONDecodeError:
+			duplicate_tags = []
+		return {
+			"id": duplicate_row["id"],
+			"title": duplicate_row["title"],
+			"content": duplicate_row["content"],
+			"tags": duplicate_tags,
+			"source": duplicate_row["source"],
+			"duplicate": True,
+		}
 
 	return {
 		"id": memory_id,
@@ -448,9 +1812,97 @@ def save_memory(
 		"content": content,
 		"tags": tags or [],
 		"source": source,
+		"duplicate": False,
 	}
 
 
+_SAVE_MEMORIES_ITEM_KEYS = frozenset({"content", "title", "tags", "source"})
+
+
+@mcp.tool
+def save_memories(
+	items: List[dict],
+	dbUrl: Optional[str] = None,
+	generate_embedding: bool = True,
+) -> List[dict]:
+	"""
+	Save several memory snippets at once. Embeddings for all items are requested
+	from the provider in a single batched call and rows are written in one
+	transaction, which is much faster than repeated save_memory calls.
+
+	- items: list of objects with `content` (required) and optional `title`,
+	  `tags` (list of strings), and `source`.
+	- dbUrl: optional database URL or path (file: URL or filesystem path).
+	- generate_embedding: whether to generate and store embeddings (requires an embedding provider).
+	"""
+	rows = []
+	for index, item in enumerate(items):
+		if not isinstance(item, dict):
+			raise ValueError(f"items[{index}] must be an object")
+		unknown = set(item) - _SAVE_MEMORIES_ITEM_KEYS
+		if unknown:
+			raise ValueError(
+				f"items[{index}] has unknown key(s): {sorted(unknown)}; allowed: {sorted(_SAVE_MEMORIES_ITEM_KEYS)}"
+			)
+		content = item.get("content")
+		if not isinstance(content, str) or not content.strip():
+			raise ValueError(f"items[{index}].content must be a non-empty string")
+		tags = item.get("tags")
+		if tags is not None and (
+			not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags)
+		):
+			raise ValueError(f"items[{index}].tags must be a list of strings")
+		for key in ("title", "source"):
+			if item.get(key) is not None and not isinstance(item[key], str):
+				raise ValueError(f"items[{index}].{key} must be a string")
+		rows.append((content, item.get("title"), tags or [], item.get("source")))
+
+	if not rows:
+		return []
+
+	appended = None
+	conn = _get_connection(dbUrl)
+	with conn:
+		embeddings = None
+		if generate_embedding:
+			embeddings = _prefetch_embeddings(conn, [content for content, _, _, _ in rows])
+
+		memory_ids: List[int] = []
+		for content, title, tags, source in rows:
+			cursor = conn.execute(
+				_INSERT_MEM_SQL, (content, title, _json_dumps(tags), source)
+			)
+			memory_ids.append(cursor.lastrowid)
+
+		if embeddings is not None:
+			try:
+				vecs = embeddings()
+				appended = _store_embeddings(
+					conn,
+					[
+						(memory_id, vec)
+						for memory_id, vec in zip(memory_ids, vecs)
+						if vec is not None
+					],
+				)
+			except Exception:
+				# If embedding fails, still keep the textual memories.
+				pass
+	_append_embedding_matrix(conn, appended)
+	_persist_embedding_matrix()
+
+	return [
+		{
+			"id": memory_id,
+			"title": title,
+			"content": content,
+			"tags": tags,
+			"source": source,
+		}
+		for memory_id, (content, title, tags, source) in zip(memory_ids, rows)
+	]
+
+
 @mcp.tool
 def update_memory(
 	memory_id: int,
@@ -483,7 +1935,7 @@ def update_memory(
 		raise ValueError("content, if provided, must be non-empty")
 
 	conn = _get_connection(dbUrl)
-	try:
+	with conn:
 		row = _get_memory_row(conn, memory_id)
 		if row is None:
 			raise ValueError(f"memory not found: id={memory_id}")
@@ -491,13 +1943,13 @@ def update_memory(
 		prev_content = row["content"]
 		new_title = row["title"] if title is None else title
 		new_content = prev_content if content is None else content
-		new_tags_json = row["tags"] if tags is None else json.dumps(tags)
+		new_tags_json = row["tags"] if tags is None else _json_dumps(tags)
 		new_source = row["source"] if source is None else source
 
 		parsed_tags: List[str]
 		if tags is None:
 			try:
-				parsed_tags = json.loads(row["tags"]) if row["tags"] else []
+				parsed_tags = _json_loads(row["tags"]) if row["tags"] else []
 			except json.JSONDecodeError:
 				parsed_tags = []
 		else:
@@ -521,18 +1973,12 @@ def update_memory(
 			)
 			if generate_embedding:
 				try:
-					vec = _embed_text(new_content)
+					vec = _get_embedding(conn, new_content)
 					if vec is not None:
-						conn.execute(
-							"INSERT INTO memory_embeddings (memory_id, model, embedding) VALUES (?, ?, ?)",
-							(memory_id, EMBEDDING_MODEL, json.dumps(vec)),
-						)
+						_store_embedding(conn, memory_id, vec)
 				except Exception:
 					pass
-
-		conn.commit()
-	finally:
-		conn.close()
+	_invalidate_embedding_matrix()
 
 	return {
 		"id": memory_id,
@@ -550,12 +1996,10 @@ def delete_memory(memory_id: int, dbUrl: Optional[str] = None) -> dict:
 	Returns whether a row was deleted.
 	"""
 	conn = _get_connection(dbUrl)
-	try:
+	with conn:
 		cur = conn.execute("DELETE FROM memories WHERE id = ?", (memory_id,))
-		conn.commit()
 		deleted = cur.rowcount > 0
-	finally:
-		conn.close()
+	_invalidate_embedding_matrix()
 
 	return {"id": memory_id, "deleted": deleted}
 
@@ -573,7 +2017,9 @@ def fetch_memories(
 	"""
 	Search memories by text query (RAG-style retrieval). By default uses
 	embedding-based semantic similarity; falls back to keyword search if
-	embeddings are not configured or unavailable.
+	embeddings are not configured or unavailable. With sqlite-vec installed,
+	vector and keyword ranks are fused (Reciprocal Rank Fusion), so keyword-only
+	matches can also be returned.
 
 	- query: text to search for (semantic match when use_vector_search is True).
 	  If omitted, null, or blank/whitespace only, returns recent memories (latest first)—same as a “list recent” view, not semantic search.
@@ -595,7 +2041,8 @@ def fetch_memories(
 	source_filter = _normalize_source_prefix(source_prefix)
 
 	conn = _get_connection(dbUrl)
-	try:
+	# Committing on exit persists any query embedding cached during search.
+	with conn:
 		# If no query is provided, return the latest memories instead of erroring.
 		if query is None or not str(query).strip():
 			rows = _fetch_latest_memories(conn, limit, tag_filter, source_filter)
@@ -605,14 +2052,15 @@ def fetch_memories(
 			)
 		else:
 			rows = _search_memories_keyword(conn, query, limit, tag_filter, source_filter)
-	finally:
-		conn.close()
+	# A matrix rebuilt during the search is written to its sidecar only now,
+	# after the query-cache writes above have committed.
+	_persist_embedding_matrix()
 
 	results: List[dict] = []
 	for row in rows:
 		raw_tags = row["tags"]
 		try:
-			parsed_tags = json.loads(raw_tags) if raw_tags else []
+			parsed_tags = _json_loads(raw_tags) if raw_tags else []
 		except json.JSONDecodeError:
 			parsed_tags = []
 
@@ -628,7 +2076,7 @@ def backfill_embeddings(db_url: Optional[str] = None) -> dict:
 	Returns a dict with backfilled, failed, and total_without counts.
 	"""
 	conn = _get_connection(db_url)
-	try:
+	with conn:
 		cursor = conn.execute(
 			"""
 			SELECT m.id, m.content
@@ -644,25 +2092,20 @@ def backfill_embeddings(db_url: Optional[str] = None) -> dict:
 		for row in rows:
 			memory_id, content = row["id"], row["content"]
 			try:
-				vec = _embed_text(content)
+				vec = _get_embedding(conn, content)
 				if vec is None:
 					failed += 1
 					continue
-				conn.execute(
-					"INSERT OR REPLACE INTO memory_embeddings (memory_id, model, embedding) VALUES (?, ?, ?)",
-					(memory_id, EMBEDDING_MODEL, json.dumps(vec)),
-				)
+				_store_embedding(conn, memory_id, vec)
 				created += 1
 			except Exception:
 				failed += 1
-		conn.commit()
-		return {
-			"backfilled": created,
-			"failed": failed,
-			"total_without": len(rows),
-		}
-	finally:
-		conn.close()
+	_invalidate_embedding_matrix()
+	return {
+		"backfilled": created,
+		"failed": failed,
+		"total_without": len(rows),
+	}
 
 
 @mcp.tool
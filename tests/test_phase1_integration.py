@@ -28,6 +28,7 @@ class TestFetchMemoriesPhase1(unittest.TestCase):
 		server.DEFAULT_DB_URL = path
 
 	def tearDown(self) -> None:
+		server._close_connections()
 		server.DEFAULT_DB_URL = self._prev_default
 		Path(self._db_path).unlink(missing_ok=True)
 
@@ -27,6 +27,7 @@ class TestPhase2Hygiene(unittest.TestCase):
 		server.DEFAULT_DB_URL = path
 
 	def tearDown(self) -> None:
+		server._close_connections()
 		server.DEFAULT_DB_URL = self._prev_default
 		Path(self._db_path).unlink(missing_ok=True)
 
@@ -47,6 +47,7 @@ class TestPhase3Filters(unittest.TestCase):
 		)
 
 	def tearDown(self) -> None:
+		server._close_connections()
 		server.DEFAULT_DB_URL = self._prev_default
 		Path(self._db_path).unlink(missing_ok=True)
 
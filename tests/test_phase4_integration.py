@@ -0,0 +1,679 @@
+"""
+Phase 4: vector search ranking over stored embeddings.
+
+The embedding provider is replaced with a deterministic fake so these checks
+run without network access or API keys.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import unittest
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import server  # noqa: E402
+
+_FAKE_VECTORS = {
+	"apples and pears": [1.0, 0.0, 0.0],
+	"bananas": [0.0, 1.0, 0.0],
+	"cherries": [0.0, 0.0, 1.0],
+	"fruit salad": [0.8, 0.5, 0.0],
+	"apples & pears": [0.99, 0.05, 0.0],
+	"a fruit salad": [0.8, 0.5, 0.01],
+	"yellow fruit": [0.1, 1.0, 0.0],
+}
+
+
+def _fake_embed_texts(texts):
+	if not all(text in _FAKE_VECTORS for text in texts):
+		return None
+	return [_FAKE_VECTORS[text] for text in texts]
+
+
+class TestPhase4VectorSearch(unittest.TestCase):
+	def setUp(self) -> None:
+		fd, path = tempfile.mkstemp(suffix=".db")
+		os.close(fd)
+		self._db_path = path
+		self._prev_default = server.DEFAULT_DB_URL
+		self._prev_embed = server._embed_texts
+		server.DEFAULT_DB_URL = path
+		server._embed_texts = _fake_embed_texts
+		server._EMBED_MEMO.clear()
+
+		for content in ("apples and pears", "bananas", "cherries"):
+			server.save_memory(
+				content=content,
+				title=content,
+				tags=["fruit", content.split()[0]],
+				source=f"orchard/{content.split()[0]}",
+			)
+
+	def tearDown(self) -> None:
+		server._close_connections()
+		server._embed_texts = self._prev_embed
+		server.DEFAULT_DB_URL = self._prev_default
+		Path(self._db_path).unlink(missing_ok=True)
+		Path(self._db_path + ".emb.f32").unlink(missing_ok=True)
+
+	def test_ranked_by_similarity(self) -> None:
+		rows = server.fetch_memories(query="fruit salad", limit=3)
+		self.assertEqual(
+			[r["content"] for r in rows],
+			["apples and pears", "bananas", "cherries"],
+		)
+
+		rows = server.fetch_memories(query="yellow fruit", limit=1)
+		self.assertEqual([r["content"] for r in rows], ["bananas"])
+
+	def test_int8_quantized_search(self) -> None:
+		prev = server.EMBEDDING_QUANTIZE
+		server.EMBEDDING_QUANTIZE = "int8"
+		try:
+			server.save_memory(content="fruit salad", title="salad")
+			conn = sqlite3.connect(self._db_path)
+			try:
+				raw_q, scale = conn.execute(
+					"SELECT embedding_q, scale FROM memory_embeddings WHERE embedding_q IS NOT NULL"
+				).fetchone()
+			finally:
+				conn.close()
+			self.assertEqual(len(raw_q), 3)
+			self.assertGreater(scale, 0.0)
+
+			# Rows saved before quantization was enabled are quantized on load.
+			rows = server.fetch_memories(query="yellow fruit", limit=2)
+			self.assertEqual([r["content"] for r in rows], ["bananas", "fruit salad"])
+		finally:
+			server.EMBEDDING_QUANTIZE = prev
+			server._invalidate_embedding_matrix()
+
+	def test_matrix_memory_mapped_from_sidecar(self) -> None:
+		conn = server._get_connection(None)
+		matrix, ids, _ = server._load_embedding_matrix(conn, 3)
+		self.assertIsInstance(matrix, np.memmap)
+		self.assertEqual(matrix.shape, (3, 3))
+		sidecar = Path(self._db_path + ".emb.f32")
+		self.assertTrue(sidecar.exists())
+
+		# A fresh process state maps the existing sidecar instead of rebuilding it.
+		server._invalidate_embedding_matrix()
+		mtime = sidecar.stat().st_mtime_ns
+		matrix2, ids2, _ = server._load_embedding_matrix(conn, 3)
+		self.assertEqual(sidecar.stat().st_mtime_ns, mtime)
+		np.testing.assert_array_equal(matrix2, matrix)
+		self.assertEqual(sorted(ids2.tolist()), sorted(ids.tolist()))
+
+		# An embedding write bumps embedding_version, so the sidecar is rewritten.
+		server.save_memory(content="yellow fruit", dedupe=False)
+		matrix3, ids3, _ = server._load_embedding_matrix(conn, 3)
+		self.assertEqual(matrix3.shape, (4, 3))
+		self.assertIsInstance(matrix3, np.memmap)
+
+		rows = server.fetch_memories(query="yellow fruit", limit=1)
+		self.assertEqual([r["content"] for r in rows], ["yellow fruit"])
+
+	def test_saves_append_to_cached_matrix(self) -> None:
+		conn = server._get_connection(None)
+		matrix, _, _ = server._load_embedding_matrix(conn, 3)
+		self.assertIsInstance(matrix, np.memmap)
+
+		decoded = []
+		prev_decode = server._decode_embedding
+		server._decode_embedding = lambda raw: decoded.append(raw) or prev_decode(raw)
+		try:
+			salad = server.save_memory(content="fruit salad")
+			(yellow,) = server.save_memories([{"content": "yellow fruit"}])
+			matrix, ids, _ = server._load_embedding_matrix(conn, 3)
+		finally:
+			server._decode_embedding = prev_decode
+		# Neither save (nor its dedupe check) rebuilt the matrix from SQLite.
+		self.assertEqual(decoded, [])
+		self.assertIsInstance(matrix, np.memmap)
+		self.assertEqual(ids.tolist()[-2:], [salad["id"], yellow["id"]])
+
+		# The appended sidecar is valid for the current version on its own.
+		server._invalidate_embedding_matrix()
+		mapped = server._read_matrix_sidecar(
+			self._db_path + ".emb.f32", server._embedding_version(conn), 3
+		)
+		self.assertIsNotNone(mapped)
+		np.testing.assert_array_equal(mapped[0], matrix)
+		np.testing.assert_array_equal(mapped[1], ids)
+
+	def test_sidecar_replaced_while_being_mapped(self) -> None:
+		conn = server._get_connection(None)
+		matrix, ids, _ = server._load_embedding_matrix(conn, 3)
+		self.assertIsInstance(matrix, np.memmap)
+		path = self._db_path + ".emb.f32"
+		token, version = server._embedding_version(conn)
+		expected = (np.array(matrix), np.array(ids))
+
+		# Another writer swaps in a smaller sidecar after the header was checked
+		# but before the rows are mapped.
+		swap = threading.Thread(
+			target=server._write_matrix_sidecar,
+			args=(path, (token, version + 1), expected[0][:1], expected[1][:1]),
+		)
+		prev_dtype = server._sidecar_record_dtype
+
+		def dtype_then_swap(dim):
+			if swap.ident is None:
+				swap.start()
+				swap.join()
+			return prev_dtype(dim)
+
+		server._sidecar_record_dtype = dtype_then_swap
+		try:
+			mapped = server._read_matrix_sidecar(path, (token, version), 3)
+		finally:
+			server._sidecar_record_dtype = prev_dtype
+		self.assertIsNotNone(mapped)
+		np.testing.assert_array_equal(mapped[0], expected[0])
+		np.testing.assert_array_equal(mapped[1], expected[1])
+		# The swapped-in file is valid only for its own version.
+		self.assertIsNone(server._read_matrix_sidecar(path, (token, version), 3))
+
+	def test_concurrent_writes_and_searches(self) -> None:
+		def embed(texts):
+			return [
+				np.random.default_rng(zlib.crc32(text.encode())).standard_normal(384).tolist()
+				for text in texts
+			]
+
+		server._embed_texts = embed
+		errors = []
+
+		def worker(n: int) -> None:
+			try:
+				for i in range(15):
+					mid = server.save_memory(content=f"w{n} note {i}", dedupe=False)["id"]
+					server.save_memories([{"content": f"w{n} batch {i}"}])
+					server.fetch_memories(query=f"w{n} query {i}", limit=3)
+					server.update_memory(mid, content=f"w{n} edited {i}")
+					if i % 2:
+						server.delete_memory(mid)
+			except Exception as exc:
+				errors.append(exc)
+			finally:
+				server._close_connections()
+
+		threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		self.assertEqual(errors, [])
+
+		conn = server._get_connection(None)
+		server._invalidate_embedding_matrix()
+		_, ids, _ = server._load_embedding_matrix(conn, 384)
+		stored = {
+			row[0] for row in conn.execute("SELECT memory_id FROM memory_embeddings WHERE dim = 384")
+		}
+		self.assertEqual(set(ids.tolist()), stored)
+
+	def test_sidecar_from_deleted_database_is_ignored(self) -> None:
+		conn = server._get_connection(None)
+		server._load_embedding_matrix(conn, 3)
+		sidecar = Path(self._db_path + ".emb.f32")
+		self.assertTrue(sidecar.exists())
+
+		# Recreate the database with the same number of embedding writes, so
+		# only the database token tells the stale sidecar apart.
+		server._close_connections()
+		server._invalidate_embedding_matrix()
+		for suffix in ("", "-wal", "-shm"):
+			Path(self._db_path + suffix).unlink(missing_ok=True)
+		cherries, apples, _ = server.save_memories(
+			[{"content": "cherries"}, {"content": "apples and pears"}, {"content": "bananas"}]
+		)
+		self.assertTrue(sidecar.exists())
+
+		matrix, ids, _ = server._load_embedding_matrix(server._get_connection(None), 3)
+		rows = dict(zip(ids.tolist(), np.asarray(matrix).tolist()))
+		np.testing.assert_allclose(rows[apples["id"]], [1.0, 0.0, 0.0])
+		np.testing.assert_allclose(rows[cherries["id"]], [0.0, 0.0, 1.0])
+
+		dup = server.save_memory(content="apples & pears")
+		self.assertTrue(dup["duplicate"])
+		self.assertEqual(dup["id"], apples["id"])
+
+	def test_hybrid_search_fuses_vector_and_keyword_ranks(self) -> None:
+		conn = server._get_connection(None)
+		if not server._vec_enabled(conn):
+			self.skipTest("sqlite-vec extension not loadable")
+		q = np.asarray(_FAKE_VECTORS["bananas"], dtype=np.float32)
+		self.assertTrue(server._sync_vec_index(conn, 3))
+
+		# bananas leads the KNN ranking, but cherries is also the only keyword
+		# hit, so RRF puts it first.
+		rows = server._search_memories_hybrid(conn, "cherries", q, 3)
+		self.assertEqual(
+			[r["content"] for r in rows], ["cherries", "bananas", "apples and pears"]
+		)
+		rows = server._search_memories_hybrid(conn, "no such words", q, 1)
+		self.assertEqual([r["content"] for r in rows], ["bananas"])
+		rows = server._search_memories_hybrid(conn, "cherries", q, 3, {"apples"})
+		self.assertEqual([r["content"] for r in rows], ["apples and pears"])
+
+		# Without embedding writes the sync is a no-op; a write makes it catch up.
+		changes = conn.total_changes
+		self.assertTrue(server._sync_vec_index(conn, 3))
+		self.assertEqual(conn.total_changes, changes)
+		conn.commit()
+		mid = server.save_memory(content="yellow fruit", dedupe=False)["id"]
+		self.assertTrue(server._sync_vec_index(conn, 3))
+		q = np.asarray(_FAKE_VECTORS["yellow fruit"], dtype=np.float32)
+		rows = server._search_memories_hybrid(conn, "no such words", q / np.linalg.norm(q), 1)
+		self.assertEqual([r["id"] for r in rows], [mid])
+
+	def test_vec_index_picks_up_re_embeds_without_extension(self) -> None:
+		conn = server._get_connection(None)
+		if not server._vec_enabled(conn):
+			self.skipTest("sqlite-vec extension not loadable")
+		self.assertTrue(server._sync_vec_index(conn, 3))
+		conn.commit()
+		cherries = server.fetch_memories(query="cherries", limit=1)[0]["id"]
+
+		# A process without sqlite-vec re-embeds a memory in place.
+		vec = np.asarray([0.6, 0.8, 0.0], dtype=np.float32)
+		plain = sqlite3.connect(self._db_path)
+		try:
+			with plain:
+				plain.execute(
+					"UPDATE memory_embeddings SET embedding = ? WHERE memory_id = ?",
+					(vec.tobytes(), cherries),
+				)
+		finally:
+			plain.close()
+
+		self.assertTrue(server._sync_vec_index(conn, 3))
+		rows = server._search_memories_hybrid(conn, "no such words", vec, 1)
+		self.assertEqual([r["id"] for r in rows], [cherries])
+
+	def test_stale_vec_index_while_database_locked(self) -> None:
+		conn = server._get_connection(None)
+		if not server._vec_enabled(conn):
+			self.skipTest("sqlite-vec extension not loadable")
+		server.fetch_memories(query="bananas", limit=1)
+		mid = server.save_memory(content="yellow fruit", dedupe=False)["id"]
+
+		other = sqlite3.connect(self._db_path, isolation_level=None)
+		try:
+			other.execute("BEGIN IMMEDIATE")
+			# The index cannot catch up, so the search uses the NumPy path.
+			rows = server.fetch_memories(query="yellow fruit", limit=1)
+			other.execute("ROLLBACK")
+		finally:
+			other.close()
+		self.assertEqual([r["id"] for r in rows], [mid])
+
+	def test_numba_kernel_matches_blas(self) -> None:
+		kernel = server._build_numba_dot()
+		if kernel is None:
+			self.skipTest("numba not installed")
+		matrix = np.random.default_rng(0).standard_normal((37, 16)).astype(np.float32)
+		q = matrix[5] / np.linalg.norm(matrix[5])
+		prev = server._numba_dot
+		server._numba_dot = kernel
+		try:
+			scores = server._score_embeddings(matrix, None, q)
+		finally:
+			server._numba_dot = prev
+		np.testing.assert_allclose(scores, matrix @ q, rtol=1e-4, atol=1e-5)
+
+	def _query_cache_size(self) -> int:
+		conn = sqlite3.connect(self._db_path)
+		try:
+			return conn.execute("SELECT COUNT(*) FROM query_cache").fetchone()[0]
+		finally:
+			conn.close()
+
+	def test_semantic_query_cache(self) -> None:
+		first = server.fetch_memories(query="fruit salad", limit=2)
+		self.assertEqual(self._query_cache_size(), 1)
+
+		# A near-identical query embedding is answered from the cache.
+		again = server.fetch_memories(query="a fruit salad", limit=2)
+		self.assertEqual([r["id"] for r in again], [r["id"] for r in first])
+		self.assertEqual(self._query_cache_size(), 1)
+
+		# Different parameters do not share entries.
+		server.fetch_memories(query="fruit salad", limit=1)
+		self.assertEqual(self._query_cache_size(), 2)
+
+		# Any write invalidates cached results.
+		server.save_memory(content="yellow fruit", dedupe=False)
+		self.assertEqual(self._query_cache_size(), 0)
+		rows = server.fetch_memories(query="a fruit salad", limit=3)
+		self.assertIn("yellow fruit", [r["content"] for r in rows])
+
+	def test_search_skips_query_cache_while_database_locked(self) -> None:
+		server.fetch_memories(query="fruit salad", limit=1)
+		self.assertEqual(self._query_cache_size(), 1)
+
+		# Another writer holds the lock (e.g. a save waiting on the provider).
+		other = sqlite3.connect(self._db_path, isolation_level=None)
+		try:
+			other.execute("BEGIN IMMEDIATE")
+			rows = server.fetch_memories(query="fruit salad", limit=2)
+			other.execute("ROLLBACK")
+		finally:
+			other.close()
+		self.assertEqual(len(rows), 2)
+		self.assertEqual(self._query_cache_size(), 1)
+
+	def test_vector_search_with_filters(self) -> None:
+		rows = server.fetch_memories(
+			query="fruit salad", limit=5, source_prefix="orchard/cherries"
+		)
+		self.assertEqual([r["content"] for r in rows], ["cherries"])
+
+		rows = server.fetch_memories(
+			query="fruit salad", limit=1, tags_any=["bananas", "cherries"]
+		)
+		self.assertEqual([r["content"] for r in rows], ["bananas"])
+
+	def test_results_reflect_updates_and_deletes(self) -> None:
+		rows = server.fetch_memories(query="yellow fruit", limit=1)
+		banana_id = rows[0]["id"]
+
+		server.delete_memory(banana_id)
+		rows = server.fetch_memories(query="yellow fruit", limit=1)
+		self.assertEqual([r["content"] for r in rows], ["apples and pears"])
+
+		cherry = server.fetch_memories(query="cherries", limit=1)[0]
+		server.update_memory(cherry["id"], content="bananas")
+		rows = server.fetch_memories(query="yellow fruit", limit=1)
+		self.assertEqual(rows[0]["id"], cherry["id"])
+
+
+class TestPhase4EmbeddingStorage(unittest.TestCase):
+	def setUp(self) -> None:
+		fd, path = tempfile.mkstemp(suffix=".db")
+		os.close(fd)
+		self._db_path = path
+		self._prev_default = server.DEFAULT_DB_URL
+		self._prev_embed = server._embed_texts
+		server.DEFAULT_DB_URL = path
+		server._embed_texts = _fake_embed_texts
+		server._EMBED_MEMO.clear()
+
+	def tearDown(self) -> None:
+		server._close_connections()
+		server._embed_texts = self._prev_embed
+		server.DEFAULT_DB_URL = self._prev_default
+		Path(self._db_path).unlink(missing_ok=True)
+		Path(self._db_path + ".emb.f32").unlink(missing_ok=True)
+
+	def test_embeddings_stored_as_float32_blob(self) -> None:
+		mid = server.save_memory(content="bananas")["id"]
+		conn = sqlite3.connect(self._db_path)
+		try:
+			raw, dim = conn.execute(
+				"SELECT embedding, dim FROM memory_embeddings WHERE memory_id = ?",
+				(mid,),
+			).fetchone()
+		finally:
+			conn.close()
+		self.assertIsInstance(raw, bytes)
+		self.assertEqual(dim, 3)
+		self.assertEqual(len(raw), 3 * 4)
+
+		mid = server.save_memory(content="fruit salad")["id"]
+		conn = sqlite3.connect(self._db_path)
+		try:
+			raw, normalized = conn.execute(
+				"SELECT embedding, normalized FROM memory_embeddings WHERE memory_id = ?",
+				(mid,),
+			).fetchone()
+		finally:
+			conn.close()
+		vec = server._decode_embedding(raw)
+		self.assertEqual(normalized, 1)
+		self.assertAlmostEqual(float((vec * vec).sum()), 1.0, places=5)
+
+	def test_embedding_cache_skips_provider(self) -> None:
+		calls = []
+
+		def counting_embed(texts):
+			calls.extend(texts)
+			return _fake_embed_texts(texts)
+
+		server._embed_texts = counting_embed
+		server.save_memory(content="bananas")
+		server.fetch_memories(query="bananas", limit=1)
+		self.assertEqual(calls, ["bananas"])
+
+		# A fresh process has an empty LRU but still hits the SQLite cache.
+		server._EMBED_MEMO.clear()
+		rows = server.fetch_memories(query="bananas", limit=1)
+		self.assertEqual(calls, ["bananas"])
+		self.assertEqual([r["content"] for r in rows], ["bananas"])
+
+	def test_search_skips_embedding_cache_while_database_locked(self) -> None:
+		server.save_memory(content="bananas")
+		server.fetch_memories(query="bananas", limit=1)
+		conn = sqlite3.connect(self._db_path)
+		try:
+			cached = conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+		finally:
+			conn.close()
+
+		other = sqlite3.connect(self._db_path, isolation_level=None)
+		try:
+			other.execute("BEGIN IMMEDIATE")
+			rows = server.fetch_memories(query="yellow fruit", limit=1)
+			other.execute("ROLLBACK")
+			count = other.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+		finally:
+			other.close()
+		self.assertEqual([r["content"] for r in rows], ["bananas"])
+		self.assertEqual(count, cached)
+
+	def test_save_memories_batches_embeddings(self) -> None:
+		batches = []
+
+		def recording_embed(texts):
+			batches.append(list(texts))
+			return _fake_embed_texts(texts)
+
+		server._embed_texts = recording_embed
+		saved = server.save_memories(
+			[
+				{"content": "bananas", "title": "b", "tags": ["fruit"]},
+				{"content": "cherries", "source": "orchard"},
+				{"content": "bananas"},
+			]
+		)
+		self.assertEqual([r["content"] for r in saved], ["bananas", "cherries", "bananas"])
+		self.assertEqual(len({r["id"] for r in saved}), 3)
+		self.assertEqual(saved[0]["tags"], ["fruit"])
+		self.assertEqual(batches, [["bananas", "cherries"]])
+
+		rows = server.fetch_memories(query="cherries", limit=1)
+		self.assertEqual(rows[0]["id"], saved[1]["id"])
+
+		with self.assertRaises(ValueError):
+			server.save_memories([{"content": "  "}])
+		with self.assertRaises(ValueError):
+			server.save_memories([{"content": "x", "color": "red"}])
+		with self.assertRaises(ValueError):
+			server.save_memories([{"content": "x"}, {"content": "y", "tags": "fruit"}])
+		with self.assertRaises(ValueError):
+			server.save_memories([{"content": "x", "tags": {"a": 1}}])
+		with self.assertRaises(ValueError):
+			server.save_memories([{"content": "x", "title": 3}])
+		with self.assertRaises(ValueError):
+			server.save_memories([{"content": "x", "source": ["a"]}])
+		# Validation happens before any row is written.
+		self.assertEqual(len(server.fetch_memories(query=None, limit=50)), 3)
+
+	def test_near_duplicate_save_returns_existing(self) -> None:
+		first = server.save_memory(content="apples and pears", title="first", tags=["a"])
+		self.assertFalse(first["duplicate"])
+
+		dup = server.save_memory(content="apples & pears", title="second")
+		self.assertTrue(dup["duplicate"])
+		self.assertEqual(dup["id"], first["id"])
+		self.assertEqual(dup["title"], "first")
+		self.assertEqual(dup["tags"], ["a"])
+
+		kept = server.save_memory(content="apples & pears", dedupe=False)
+		self.assertFalse(kept["duplicate"])
+		self.assertNotEqual(kept["id"], first["id"])
+
+		other = server.save_memory(content="bananas")
+		self.assertFalse(other["duplicate"])
+
+		rows = server.fetch_memories(query=None, limit=10, use_vector_search=False)
+		self.assertEqual(len(rows), 3)
+
+	def test_dedupe_errors_are_not_swallowed(self) -> None:
+		def broken(conn, vec):
+			raise RuntimeError("matrix unavailable")
+
+		prev = server._find_duplicate
+		server._find_duplicate = broken
+		try:
+			with self.assertRaises(RuntimeError):
+				server.save_memory(content="bananas")
+		finally:
+			server._find_duplicate = prev
+		rows = server.fetch_memories(query=None, limit=10, use_vector_search=False)
+		self.assertEqual(rows, [])
+
+		# A provider failure still keeps the memory, without an embedding.
+		server._embed_texts = lambda texts: None
+		saved = server.save_memory(content="bananas")
+		self.assertFalse(saved["duplicate"])
+		self.assertEqual(len(server.fetch_memories(query=None, use_vector_search=False)), 1)
+
+	def test_legacy_json_embeddings_are_migrated(self) -> None:
+		conn = sqlite3.connect(self._db_path)
+		try:
+			conn.execute(server.CREATE_TABLE_SQL)
+			conn.execute(
+				"""
+				CREATE TABLE memory_embeddings (
+				  memory_id INTEGER PRIMARY KEY,
+				  model TEXT NOT NULL,
+				  embedding TEXT NOT NULL
+				)
+				"""
+			)
+			for content, vec in (("bananas", [0.0, 1.0, 0.0]), ("cherries", [0.0, 0.0, 1.0])):
+				cur = conn.execute("INSERT INTO memories (content) VALUES (?)", (content,))
+				conn.execute(
+					"INSERT INTO memory_embeddings (memory_id, model, embedding) VALUES (?, ?, ?)",
+					(cur.lastrowid, server.EMBEDDING_MODEL, json.dumps(vec)),
+				)
+			conn.commit()
+		finally:
+			conn.close()
+
+		rows = server.fetch_memories(query="yellow fruit", limit=1)
+		self.assertEqual([r["content"] for r in rows], ["bananas"])
+
+		conn = sqlite3.connect(self._db_path)
+		try:
+			types = {
+				row[1]: row[2]
+				for row in conn.execute("PRAGMA table_info(memory_embeddings)")
+			}
+			dims = [r[0] for r in conn.execute("SELECT dim FROM memory_embeddings")]
+		finally:
+			conn.close()
+		self.assertEqual(types["embedding"], "BLOB")
+		self.assertEqual(dims, [3, 3])
+
+
+class TestPhase4KeywordSearch(unittest.TestCase):
+	def setUp(self) -> None:
+		fd, path = tempfile.mkstemp(suffix=".db")
+		os.close(fd)
+		self._db_path = path
+		self._prev_default = server.DEFAULT_DB_URL
+		server.DEFAULT_DB_URL = path
+
+	def tearDown(self) -> None:
+		server._close_connections()
+		server.DEFAULT_DB_URL = self._prev_default
+		Path(self._db_path).unlink(missing_ok=True)
+		Path(self._db_path + ".emb.f32").unlink(missing_ok=True)
+
+	def _keyword(self, query: str):
+		return server.fetch_memories(query=query, limit=10, use_vector_search=False)
+
+	def test_full_text_index_tracks_writes(self) -> None:
+		mid = server.save_memory(
+			content="retry the deploy-script after OAuth error",
+			title="deploy notes",
+			generate_embedding=False,
+		)["id"]
+		server.save_memory(content="unrelated grocery list", generate_embedding=False)
+
+		self.assertEqual([r["id"] for r in self._keyword("deploy-script")], [mid])
+		self.assertEqual([r["id"] for r in self._keyword("oauth ERR")], [mid])
+		self.assertEqual([r["id"] for r in self._keyword('notes "AND" OR')], [])
+		self.assertEqual(self._keyword("--- ***"), [])
+
+		server.update_memory(mid, content="rotate the signing key")
+		self.assertEqual(self._keyword("deploy-script"), [])
+		self.assertEqual([r["id"] for r in self._keyword("signing")], [mid])
+
+		server.delete_memory(mid)
+		self.assertEqual(self._keyword("signing"), [])
+
+	def test_substring_fallback_for_unspaced_scripts(self) -> None:
+		mid = server.save_memory(content="日本語のテキスト", generate_embedding=False)["id"]
+		server.save_memory(content="english text", generate_embedding=False)
+
+		self.assertEqual([r["id"] for r in self._keyword("日本語のテキスト")], [mid])
+		self.assertEqual([r["id"] for r in self._keyword("テキスト")], [mid])
+		self.assertEqual(self._keyword("ext"), [])
+
+	def test_index_built_for_existing_database(self) -> None:
+		conn = sqlite3.connect(self._db_path)
+		try:
+			conn.execute(server.CREATE_TABLE_SQL)
+			conn.execute(
+				"INSERT INTO memories (content, title) VALUES (?, ?)",
+				("legacy row about sqlite", "legacy"),
+			)
+			conn.commit()
+		finally:
+			conn.close()
+
+		rows = self._keyword("sqlite")
+		self.assertEqual([r["title"] for r in rows], ["legacy"])
+
+	def test_latest_memories_walk_created_index(self) -> None:
+		first = server.save_memory(content="first", generate_embedding=False)["id"]
+		second = server.save_memory(content="second", generate_embedding=False)["id"]
+		rows = server.fetch_memories(query=None, limit=1, use_vector_search=False)
+		self.assertEqual([r["id"] for r in rows], [second])
+		self.assertNotEqual(first, second)
+
+		conn = server._get_connection(None)
+		plan = " ".join(
+			row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + server._LATEST_MEM_SQL, (1,))
+		)
+		self.assertIn("idx_memories_created", plan)
+		self.assertNotIn("TEMP B-TREE", plan)
+
+
+if __name__ == "__main__":
+	unittest.main()